@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import sys
+from flask import request, send_from_directory
+
+# ----------------------
+# Archivos estáticos con huella (fingerprint)
+# ----------------------
+# `python assets.py` copia cada archivo de static/ a static/build/ con el hash
+# de su contenido en el nombre (style.css -> style.1a2b3c4d5e.css), genera
+# variantes .gz/.br de los archivos de texto y escribe build/manifest.json.
+# La app reescribe url_for('static', ...) con el manifiesto y sirve esos
+# archivos con Cache-Control: immutable, porque si cambian cambia su nombre.
+BUILD_DIR = "build"
+MANIFEST = "manifest.json"
+SKIP_DIRS = {BUILD_DIR, "uploads"}
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".ico"}
+CSS_URL = re.compile(r"""url\((['"]?)/static/([^'")]+)\1\)""")
+ONE_YEAR = 365 * 24 * 3600
+
+def _hashed_name(path, data):
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    base, ext = os.path.splitext(path)
+    return f"{base}.{digest}{ext}"
+
+def _write(dest, data):
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with open(dest, "wb") as f:
+        f.write(data)
+
+def _compress(dest, data):
+    with open(dest + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(dest + ".br", "wb") as f:
+        f.write(brotli.compress(data, quality=11))
+
+def build(static_dir):
+    out_dir = os.path.join(static_dir, BUILD_DIR)
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    archivos = []
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            archivos.append(os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/"))
+
+    # CSS al final: sus url('/static/...') apuntan a nombres ya con huella
+    archivos.sort(key=lambda p: (p.endswith(".css"), p))
+    manifest = {}
+    for rel in archivos:
+        with open(os.path.join(static_dir, rel), "rb") as f:
+            data = f.read()
+        if rel.endswith(".css"):
+            texto = data.decode("utf-8")
+            texto = CSS_URL.sub(
+                lambda m: f"url({m.group(1)}/static/{BUILD_DIR}/{manifest[m.group(2)]}{m.group(1)})"
+                if m.group(2) in manifest else m.group(0), texto)
+            data = texto.encode("utf-8")
+        hashed = _hashed_name(rel, data)
+        dest = os.path.join(out_dir, hashed)
+        _write(dest, data)
+        if os.path.splitext(rel)[1].lower() in COMPRESSIBLE:
+            _compress(dest, data)
+        manifest[rel] = hashed
+
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+# ----------------------
+# Integración con Flask
+# ----------------------
+def init_app(app):
+    path = os.path.join(app.static_folder, BUILD_DIR, MANIFEST)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        # Sin build (desarrollo): los estáticos se sirven tal cual
+        return
+
+    @app.url_defaults
+    def fingerprint(endpoint, values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = f"{BUILD_DIR}/{manifest[values['filename']]}"
+
+    default_static = app.view_functions["static"]
+
+    def static(filename):
+        if not filename.startswith(BUILD_DIR + "/"):
+            return default_static(filename=filename)
+
+        for encoding, ext in (("br", ".br"), ("gzip", ".gz")):
+            if request.accept_encodings[encoding] and os.path.isfile(os.path.join(app.static_folder, filename + ext)):
+                response = send_from_directory(app.static_folder, filename + ext, mimetype=_mimetype(filename))
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = send_from_directory(app.static_folder, filename)
+        response.headers["Cache-Control"] = f"public, max-age={ONE_YEAR}, immutable"
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.view_functions["static"] = static
+
+def _mimetype(filename):
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+if __name__ == "__main__":
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    generados = build(static_dir)
+    print(f"{len(generados)} archivos con huella en {os.path.join(static_dir, BUILD_DIR)}")
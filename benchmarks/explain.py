@@ -0,0 +1,329 @@
+import argparse
+import ast
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------
+# Revisión de planes de consulta
+# ----------------------
+# Extrae del código todas las sentencias SELECT/UPDATE/DELETE que se pasan a
+# cursor.execute(), las corre con EXPLAIN contra una base sembrada (la misma
+# de benchmarks/run.py) y falla si alguna recorre una tabla completa
+# (type = ALL) sin estar en PERMITIDAS, o si queda SQL dinámico sin resolver.
+#
+#   python benchmarks/explain.py            # siembra evalve_bench y revisa
+#   python benchmarks/explain.py --no-seed  # reutiliza la base ya sembrada
+#   python benchmarks/explain.py --solo-sql # sin MySQL: solo lista y resuelve el SQL
+ARCHIVOS = ("server.py", "blueprints/helpers.py", "blueprints/auth.py", "blueprints/tienda.py",
+            "blueprints/carrito.py", "blueprints/multimedia.py", "blueprints/admin.py",
+            "pagination.py", "reservas.py", "bulk.py", "storage.py", "migrate.py")
+
+# Consultas que leen la tabla completa a propósito: (archivo, fragmento del SQL) -> motivo
+PERMITIDAS = {
+    ("blueprints/tienda.py", "FROM productos WHERE stock > 0"): "catálogo completo, cacheado en catalogo_cache",
+    ("server.py", "SELECT id, nombre, descripcion FROM productos"): "construcción del índice de búsqueda",
+    ("server.py", "SELECT id, username, comentario FROM comentarios"): "construcción del índice de búsqueda",
+    ("server.py", "imagen_url IS NOT NULL AND imagen_thumb IS NULL"): "comando de mantenimiento",
+    ("bulk.py", "ORDER BY id"): "exportación completa de la tabla (/admin/exportar)",
+    ("storage.py", "FROM archivos"): "estadísticas del almacén (/admin/almacen)",
+    ("migrate.py", "FROM schema_migrations"): "tabla de unas cuantas filas",
+}
+
+# Partes dinámicas de los f-strings que solo repiten marcadores: se resuelven
+# a su forma con un solo valor
+SUSTITUCIONES = {
+    "format_strings": "%s",
+    "cases": "WHEN %s THEN %s",
+    "','.join(['%s'] * len(ids))": "%s",
+    "','.join(['%s'] * len(reservas_ids))": "%s",
+    "','.join(['%s'] * len(valores))": "%s",
+}
+
+# --- SQL armado en tiempo de ejecución ---
+# Para las funciones que arman el SQL con variables (tabla, columnas, WHERE)
+# no se copia el texto: se corre el código real contra una conexión que solo
+# graba lo que se ejecuta, con las mismas constantes de columnas que usa la
+# app. Cualquier SQL dinámico de una función que no esté aquí hace fallar la
+# revisión.
+class Grabadora:
+    # Hace de conexión y de cursor; las consultas no regresan filas
+    rowcount = 0
+    lastrowid = 0
+
+    def __init__(self):
+        self.sql = []
+
+    def cursor(self, *args, **kwargs):
+        return self
+
+    def execute(self, query, args=None):
+        self.sql.append(" ".join(query.split()))
+
+    def executemany(self, query, args):
+        self.execute(query)
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def __iter__(self):
+        return iter(())
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def _constantes(archivo):
+    # Asignaciones de nivel módulo con valor literal (COLUMNAS_PRODUCTO = "...")
+    with open(os.path.join(ROOT, archivo), encoding="utf-8") as f:
+        arbol = ast.parse(f.read())
+    valores = {}
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Assign) and len(nodo.targets) == 1 and isinstance(nodo.targets[0], ast.Name):
+            try:
+                valores[nodo.targets[0].id] = ast.literal_eval(nodo.value)
+            except ValueError:
+                pass
+    return valores
+
+def _llamadas(nombre):
+    # Argumentos literales de cada llamada a `nombre(...)` en ARCHIVOS
+    for archivo in ARCHIVOS:
+        with open(os.path.join(ROOT, archivo), encoding="utf-8") as f:
+            arbol = ast.parse(f.read())
+        constantes = _constantes(archivo)
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Name) and nodo.func.id == nombre:
+                def valor(arg):
+                    if isinstance(arg, ast.Name):
+                        return constantes.get(arg.id, arg.id)
+                    try:
+                        return ast.literal_eval(arg)
+                    except ValueError:
+                        return None
+                yield [valor(a) for a in nodo.args], {k.arg: valor(k.value) for k in nodo.keywords}
+
+def _keyset(g):
+    from pagination import keyset_by_id
+    for args, kwargs in _llamadas("keyset_by_id"):
+        _, columnas, tabla = args[:3]
+        for despues in (None, 1):
+            keyset_by_id(g, columnas, tabla, 20, despues, desc=kwargs.get("desc", True) is not False)
+
+def _liberar(g):
+    import reservas
+    reservas.liberar(g, "0" * 32)
+    reservas.liberar_vencidas(g)
+
+def _versiones(g):
+    from blueprints.helpers import COLUMNAS_VERSIONES, guardar_versiones
+    for tabla in COLUMNAS_VERSIONES:
+        guardar_versiones(g, tabla, 1, {})
+
+def _exportar(g):
+    import bulk
+    for tabla in bulk.EXPORTS:
+        list(bulk.export_rows(g, tabla, "csv"))
+
+def _existentes(g):
+    import bulk
+    for tabla, columnas in bulk.UNIQUE.items():
+        for columna in columnas:
+            bulk._existentes(g, tabla, columna, ["a", "b"])
+
+def _migraciones(g):
+    # Las sentencias de migrations/*.sql; de ellas solo se revisan SELECT/UPDATE/DELETE
+    import migrate
+    migrate.migrate(g, log=lambda _: None)
+
+# (archivo, función que arma el SQL) -> función que la ejercita con la grabadora
+VARIANTES = {
+    ("pagination.py", "keyset_by_id"): _keyset,
+    ("reservas.py", "_liberar"): _liberar,
+    ("blueprints/helpers.py", "guardar_versiones"): _versiones,
+    ("bulk.py", "export_rows"): _exportar,
+    ("bulk.py", "_existentes"): _existentes,
+    ("migrate.py", "migrate"): _migraciones,
+}
+
+# Valor de ejemplo según la columna que compara el marcador (el resto: 1)
+EJEMPLOS = {
+    "username": "'user1'",
+    "email": "'user1@example.com'",
+    "token": "'" + "0" * 32 + "'",
+    "hash": "'" + "0" * 64 + "'",
+    "fecha": "NOW()",
+    "estado": "'activa'",
+}
+_COMPARACION = re.compile(r"(\w+)\s*(?:[<>=!]+|\bIN\s*\((?:\s*%s\s*,)*)\s*$", re.I)
+
+def _fuente(nodo, fuente):
+    if isinstance(nodo, ast.Constant) and isinstance(nodo.value, str):
+        return nodo.value
+    if isinstance(nodo, ast.JoinedStr):
+        partes = []
+        for v in nodo.values:
+            if isinstance(v, ast.Constant):
+                partes.append(v.value)
+            else:
+                expr = ast.get_source_segment(fuente, v.value)
+                partes.append(SUSTITUCIONES.get(expr, "{" + expr + "}"))
+        return "".join(partes)
+    if isinstance(nodo, ast.BinOp) and isinstance(nodo.op, ast.Add):
+        izq, der = _fuente(nodo.left, fuente), _fuente(nodo.right, fuente)
+        return izq + der if izq is not None and der is not None else None
+    return None
+
+def _funciones(arbol):
+    # id(nodo) -> nombre de la función más interna que lo contiene
+    dueno = {}
+    for funcion in ast.walk(arbol):
+        if isinstance(funcion, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for nodo in ast.walk(funcion):
+                dueno[id(nodo)] = funcion.name
+    return dueno
+
+def consultas():
+    # ([(archivo, línea, sql)], [(archivo, línea, sql) sin resolver]) de cada
+    # cursor.execute(...) del código, con el SQL dinámico ya resuelto por VARIANTES
+    encontradas, sin_resolver, usadas = [], [], set()
+    for archivo in ARCHIVOS:
+        with open(os.path.join(ROOT, archivo), encoding="utf-8") as f:
+            fuente = f.read()
+        arbol = ast.parse(fuente)
+        dueno = _funciones(arbol)
+        for nodo in ast.walk(arbol):
+            if (isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Attribute)
+                    and nodo.func.attr in ("execute", "executemany") and nodo.args):
+                sql = _fuente(nodo.args[0], fuente)
+                if sql is not None and "{" not in sql:
+                    encontradas.append((archivo, nodo.lineno, " ".join(sql.split())))
+                    continue
+                if sql is not None and sql.split(None, 1)[0].upper() not in ("SELECT", "UPDATE", "DELETE"):
+                    continue
+                clave = (archivo, dueno.get(id(nodo)))
+                if clave in VARIANTES:
+                    usadas.add(clave)
+                else:
+                    sin_resolver.append((archivo, nodo.lineno, " ".join((sql or ast.get_source_segment(fuente, nodo.args[0])).split())))
+    encontradas.sort()
+    for archivo, funcion in sorted(usadas):
+        grabadora = Grabadora()
+        VARIANTES[(archivo, funcion)](grabadora)
+        if not grabadora.sql:
+            sin_resolver.append((archivo, funcion, "VARIANTES no generó ninguna consulta"))
+        for sql in dict.fromkeys(grabadora.sql):
+            encontradas.append((archivo, funcion, sql))
+    return encontradas, sin_resolver
+
+def _concretar(sql):
+    # Cambia cada %s por un valor de ejemplo acorde a la columna de la izquierda
+    def valor(m):
+        antes = sql[:m.start()]
+        if re.search(r"LIMIT\s*$", antes, re.I):
+            return "20"
+        comparacion = _COMPARACION.search(antes)
+        return EJEMPLOS.get(comparacion.group(1).lower(), "1") if comparacion else "1"
+    return re.sub(r"%s", valor, sql)
+
+def permitida(archivo, sql):
+    return next((motivo for (a, fragmento), motivo in PERMITIDAS.items()
+                 if a == archivo and fragmento in sql), None)
+
+def _verbo(sql):
+    return sql.split(None, 1)[0].upper()
+
+def revisar(conn):
+    from MySQLdb.cursors import DictCursor
+
+    encontradas, fallas = consultas()
+    cursor = conn.cursor(DictCursor)
+    for archivo, linea, sql in encontradas:
+        if _verbo(sql) not in ("SELECT", "UPDATE", "DELETE"):
+            continue
+        cursor.execute("EXPLAIN " + _concretar(sql))
+        for fila in cursor.fetchall():
+            escaneo = fila.get("type") == "ALL"
+            motivo = permitida(archivo, sql) if escaneo else None
+            estado = "OK" if not escaneo else ("permitida" if motivo else "FALLA")
+            print(f"{estado:<10}{archivo}:{linea:<18}{fila.get('table') or '-':<14}{fila.get('type') or '-':<8}"
+                  f"{fila.get('key') or '-':<28}{fila.get('rows') or 0:>8}  {sql[:70]}")
+            if escaneo and not motivo:
+                fallas.append((archivo, linea, sql))
+    cursor.close()
+    return fallas
+
+def listar():
+    # Sin base de datos: el SQL que se revisaría, ya concretado
+    encontradas, sin_resolver = consultas()
+    for archivo, linea, sql in encontradas:
+        if _verbo(sql) in ("SELECT", "UPDATE", "DELETE"):
+            print(f"{archivo}:{linea:<18}{_concretar(sql)}")
+    return sin_resolver
+
+def _reportar(fallas, sin_resolver):
+    for archivo, linea, sql in sin_resolver:
+        print(f"{'FALLA':<10}{archivo}:{linea:<18}SQL dinámico sin resolver (agregar a VARIANTES): {sql[:90]}")
+    if fallas:
+        print(f"\n{len(fallas)} consulta(s) recorren la tabla completa:")
+        for archivo, linea, sql in fallas:
+            print(f"  {archivo}:{linea}  {sql}")
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN de todas las consultas contra una base sembrada")
+    parser.add_argument("--no-seed", action="store_true", help="no recrear la base")
+    parser.add_argument("--solo-sql", action="store_true",
+                        help="sin base: listar el SQL y fallar solo si queda SQL dinámico sin resolver")
+    parser.add_argument("--productos", type=int, default=2000)
+    parser.add_argument("--comentarios", type=int, default=20000)
+    parser.add_argument("--usuarios", type=int, default=5000)
+    parser.add_argument("--multimedia", type=int, default=2000)
+    parser.add_argument("--reservas", type=int, default=20000)
+    parser.add_argument("--mysql-host", default=os.environ.get("MYSQL_HOST", "127.0.0.1"))
+    parser.add_argument("--mysql-port", type=int, default=int(os.environ.get("MYSQL_PORT", 3306)))
+    parser.add_argument("--mysql-user", default=os.environ.get("MYSQL_USER", "root"))
+    parser.add_argument("--mysql-password", default=os.environ.get("MYSQL_PASSWORD", ""))
+    parser.add_argument("--mysql-db", default="evalve_bench", help="se BORRA y se recrea")
+    args = parser.parse_args()
+
+    if args.solo_sql:
+        sin_resolver = listar()
+        _reportar([], sin_resolver)
+        if sin_resolver:
+            sys.exit(1)
+        print("\nTodo el SQL dinámico quedó resuelto")
+        return
+
+    import MySQLdb
+    from run import preparar_base
+
+    if not args.no_seed:
+        preparar_base(args)
+    conn = MySQLdb.connect(host=args.mysql_host, user=args.mysql_user, passwd=args.mysql_password,
+                           port=args.mysql_port, db=args.mysql_db, charset="utf8mb4")
+    cursor = conn.cursor()
+    for tabla in ("regis", "productos", "multimedia", "comentarios", "reservas", "archivos"):
+        cursor.execute(f"ANALYZE TABLE {tabla}")
+        cursor.fetchall()
+    cursor.close()
+    fallas = revisar(conn)
+    conn.close()
+    _reportar(fallas, [])
+    if fallas:
+        sys.exit(1)
+    print("\nSin recorridos completos fuera de PERMITIDAS ni SQL dinámico sin resolver")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run import BENCH_USER, Cliente, levantar_app, percentil, preparar_base
+
+# ----------------------
+# Benchmark: ráfaga de logins
+# ----------------------
+# Levanta la app real (server.create_app, como benchmarks/run.py) sobre la
+# base sembrada, limitada a N peticiones simultáneas como N workers síncronos
+# de Gunicorn. Mientras unos clientes inundan POST /login con contraseñas
+# equivocadas (cada una cuesta un hash completo), otros visitan rutas baratas.
+# Se repite en tres modos:
+#   inline        hash en el hilo de la petición (PASSWORD_HASH_WORKERS = 0), sin límites
+#   pool          pool acotado de passwords.py, sin límites de intentos
+#   pool+limite   pool acotado con los límites por IP/usuario de auth.py
+# y se reporta logins/s, respuestas por código (200 = contraseña incorrecta,
+# 429 = límite, 503 = pool lleno) y la latencia de las otras rutas.
+#
+#   python benchmarks/login_flood.py --workers 4 --atacantes 16 --duracion 20
+MODOS = {
+    "inline": {"PASSWORD_HASH_WORKERS": 0},
+    "pool": {},
+    # Los límites reales (AUTH_*); run.py los desactiva por defecto
+    "pool+limite": {"AUTH_IP_RATE": 10 / 60, "AUTH_IP_BURST": 10, "AUTH_USER_RATE": 5 / 60, "AUTH_USER_BURST": 5},
+}
+
+def resumen(valores):
+    if not valores:
+        return {"n": 0}
+    return {
+        "n": len(valores),
+        "p50_ms": round(percentil(valores, 50) * 1000, 2),
+        "p95_ms": round(percentil(valores, 95) * 1000, 2),
+        "p99_ms": round(percentil(valores, 99) * 1000, 2),
+        "mean_ms": round(statistics.mean(valores) * 1000, 2),
+    }
+
+def correr(modo, args):
+    extra = {"PASSWORD_HASH_WORKERS": args.hash_workers, "PASSWORD_HASH_MAX_PENDING": args.max_pending,
+             **MODOS[modo]}
+    # Login y rutas baratas no llaman a Stripe: no hace falta el Stripe falso
+    httpd, base = levantar_app(args, "http://127.0.0.1:9", extra=extra, workers=args.workers)
+    rutas = args.rutas.split(",")
+    lat_login, lat_otras = [], []
+    codigos, codigos_otras = Counter(), Counter()
+    lock = threading.Lock()
+    parar = threading.Event()
+
+    def atacante():
+        c = Cliente(base)
+        while not parar.is_set():
+            status, segundos, _ = c.request("POST", "/login", {"usuario": BENCH_USER, "password": "incorrecta"})
+            with lock:
+                lat_login.append(segundos)
+                codigos[status] += 1
+
+    def visitante(i):
+        c = Cliente(base)
+        n = i
+        while not parar.is_set():
+            status, segundos, _ = c.request("GET", rutas[n % len(rutas)])
+            n += 1
+            with lock:
+                lat_otras.append(segundos)
+                codigos_otras[status] += 1
+            time.sleep(args.pausa)
+
+    # Calentamiento: pool de conexiones, plantillas y el pool de hash ya creados
+    c = Cliente(base)
+    for ruta in rutas:
+        c.request("GET", ruta)
+    c.request("POST", "/login", {"usuario": BENCH_USER, "password": "incorrecta"})
+
+    hilos = ([threading.Thread(target=atacante) for _ in range(args.atacantes)]
+             + [threading.Thread(target=visitante, args=(i,)) for i in range(args.visitantes)])
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    time.sleep(args.duracion)
+    parar.set()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+    httpd.shutdown()
+
+    return {
+        "modo": modo,
+        "duracion_s": round(duracion, 3),
+        "logins_por_s": round(sum(codigos.values()) / duracion, 2),
+        "logins_verificados_por_s": round(codigos[200] / duracion, 2),
+        "logins_por_codigo": dict(sorted(codigos.items())),
+        "latencia_login": resumen(lat_login),
+        "otras_rutas_por_codigo": dict(sorted(codigos_otras.items())),
+        "latencia_otras_rutas": resumen(lat_otras),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Ráfaga de logins contra la app: hash en línea vs pool acotado y límites")
+    parser.add_argument("--modos", default=",".join(MODOS))
+    parser.add_argument("--workers", type=int, default=4, help="peticiones simultáneas (workers síncronos)")
+    parser.add_argument("--atacantes", type=int, default=16, help="clientes que inundan /login")
+    parser.add_argument("--visitantes", type=int, default=4, help="clientes en rutas baratas")
+    parser.add_argument("--rutas", default="/,/tienda,/juego/half-life", help="rutas baratas, separadas por coma")
+    parser.add_argument("--pausa", type=float, default=0.02, help="segundos entre peticiones de cada visitante")
+    parser.add_argument("--duracion", type=float, default=20, help="segundos por modo")
+    parser.add_argument("--hash-workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=4)
+    parser.add_argument("--no-seed", action="store_true", help="no recrear la base")
+    parser.add_argument("--productos", type=int, default=200)
+    parser.add_argument("--comentarios", type=int, default=2000)
+    parser.add_argument("--usuarios", type=int, default=100)
+    parser.add_argument("--multimedia", type=int, default=100)
+    parser.add_argument("--reservas", type=int, default=0)
+    parser.add_argument("--mysql-host", default=os.environ.get("MYSQL_HOST", "127.0.0.1"))
+    parser.add_argument("--mysql-port", type=int, default=int(os.environ.get("MYSQL_PORT", 3306)))
+    parser.add_argument("--mysql-user", default=os.environ.get("MYSQL_USER", "root"))
+    parser.add_argument("--mysql-password", default=os.environ.get("MYSQL_PASSWORD", ""))
+    parser.add_argument("--mysql-db", default="evalve_bench", help="se BORRA y se recrea")
+    parser.add_argument("--output", help="guardar resultados en JSON")
+    args = parser.parse_args()
+    # Pool de MySQL de la app: run.py lo dimensiona con concurrency + 2
+    args.concurrency = args.workers
+
+    if not args.no_seed:
+        preparar_base(args)
+    resultados = [correr(modo, args) for modo in args.modos.split(",")]
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+    print(texto)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(texto)
+
+if __name__ == "__main__":
+    main()
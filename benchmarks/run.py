@@ -0,0 +1,299 @@
+import argparse
+import datetime
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# ----------------------
+# Benchmark de rutas principales
+# ----------------------
+# 1. Crea (o recrea) una base de datos de pruebas en el MySQL/MariaDB local,
+#    aplica migrations/*.sql y la llena con datos de ejemplo.
+# 2. Levanta un Stripe falso (fake_stripe.py) y la app (server.create_app) en un servidor
+#    WSGI con hilos, configurado para esa base.
+# 3. Lanza N clientes concurrentes contra cada escenario y reporta rps,
+#    latencias p50/p95/p99 y consultas por petición (cabecera X-Query-Count).
+#
+#   python benchmarks/run.py --concurrency 8 --requests 400 --output bench.json
+#   python benchmarks/run.py --baseline bench.json      # compara contra otra corrida
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench1234"
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# --- Base de datos ---
+def preparar_base(args):
+    import MySQLdb
+    import migrate
+    from werkzeug.security import generate_password_hash
+
+    conn = MySQLdb.connect(host=args.mysql_host, user=args.mysql_user, passwd=args.mysql_password,
+                           port=args.mysql_port, charset="utf8mb4")
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{args.mysql_db}`")
+    cursor.execute(f"CREATE DATABASE `{args.mysql_db}` CHARACTER SET utf8mb4")
+    cursor.execute(f"USE `{args.mysql_db}`")
+    migrate.migrate(conn, log=lambda _: None)
+
+    rnd = random.Random(42)
+    cursor.execute("INSERT INTO regis (nombre, apellidos, username, email, password, rol) VALUES (%s, %s, %s, %s, %s, %s)",
+                   ("Bench", "Mark", BENCH_USER, "bench@example.com", generate_password_hash(BENCH_PASSWORD), "usuario"))
+    cursor.executemany("INSERT INTO regis (nombre, apellidos, username, email, password, rol) VALUES (%s, %s, %s, %s, %s, %s)",
+                       [(f"Usuario{i}", "Prueba", f"user{i}", f"user{i}@example.com", "x", "usuario") for i in range(args.usuarios)])
+    cursor.executemany("INSERT INTO productos (nombre, descripcion, precio, stock, imagen_url) VALUES (%s, %s, %s, %s, %s)",
+                       [(f"Producto {i}", "Descripción de prueba " * 5, rnd.randint(50, 2000), 1_000_000, None)
+                        for i in range(args.productos)])
+    cursor.executemany("INSERT INTO comentarios (username, comentario, fecha) VALUES (%s, %s, NOW() - INTERVAL %s SECOND)",
+                       [(f"user{rnd.randrange(max(args.usuarios, 1))}", "Comentario de prueba " * 3, i)
+                        for i in range(args.comentarios)])
+    cursor.executemany("INSERT INTO multimedia (tipo, nombre, ruta, usuario) VALUES (%s, %s, %s, %s)",
+                       [("imagen", f"img{i}.png", f"uploads/img{i}.png", BENCH_USER) for i in range(args.multimedia)])
+    # Historial de reservas: casi todas confirmadas o liberadas, unas cuantas
+    # activas (vigentes y vencidas) como las que encuentra el barrendero
+    estados = ["confirmada"] * 60 + ["liberada"] * 30 + ["activa"] * 10
+    filas = []
+    for i in range(args.reservas):
+        estado = rnd.choice(estados)
+        minutos = rnd.randint(-30, 30) if estado == "activa" else -rnd.randint(60, 60 * 24 * 30)
+        filas.append((f"{i:032x}", rnd.randint(1, max(args.productos, 1)), rnd.randint(1, 3), estado,
+                      f"user{rnd.randrange(max(args.usuarios, 1))}", minutos))
+    cursor.executemany("INSERT INTO reservas (token, producto_id, cantidad, estado, usuario, expira) "
+                       "VALUES (%s, %s, %s, %s, %s, NOW() + INTERVAL %s MINUTE)", filas)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+# --- App ---
+def limitar_workers(app, workers):
+    # Como N workers síncronos de Gunicorn: a lo más N peticiones a la vez, el
+    # resto espera su turno
+    lugares = threading.BoundedSemaphore(workers)
+
+    def wsgi(environ, start_response):
+        with lugares:
+            respuesta = app(environ, start_response)
+            try:
+                return list(respuesta)
+            finally:
+                if hasattr(respuesta, "close"):
+                    respuesta.close()
+    return wsgi
+
+def levantar_app(args, stripe_base, extra=None, workers=None):
+    # `extra` sobrescribe la configuración de abajo; `workers` limita las
+    # peticiones simultáneas (ver limitar_workers)
+    from werkzeug.serving import make_server
+    from server import create_app, ADMISSION_DEFAULTS
+
+    app = create_app({
+        "SECRET_KEY": "bench",
+        "MYSQL_HOST": args.mysql_host,
+        "MYSQL_USER": args.mysql_user,
+        "MYSQL_PASSWORD": args.mysql_password,
+        "MYSQL_PORT": args.mysql_port,
+        "MYSQL_DB": args.mysql_db,
+        "MYSQL_POOL_SIZE": args.concurrency + 2,
+        "STRIPE_SECRET_KEY": "sk_test_bench",
+        "STRIPE_API_BASE": stripe_base,
+        "WTF_CSRF_ENABLED": False,
+        "QUERY_COUNT_HEADER": True,
+        "SESSION_BACKEND": "memory",
+        # Sin límites de intentos: todo el tráfico sale de 127.0.0.1
+        "AUTH_IP_RATE": 1e9, "AUTH_IP_BURST": 1e9,
+        "AUTH_USER_RATE": 1e9, "AUTH_USER_BURST": 1e9,
+        # Ni control de admisión: se mide la app, no el rechazo
+        "ADMISSION_LIMITS": {ruta: {"concurrency": None, "rate": None} for ruta in ADMISSION_DEFAULTS},
+        **(extra or {}),
+    })
+
+    port = free_port()
+    httpd = make_server("127.0.0.1", port, limitar_workers(app, workers) if workers else app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, name="bench-app", daemon=True).start()
+    return httpd, f"http://127.0.0.1:{port}"
+
+# --- Clientes ---
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class Cliente:
+    def __init__(self, base):
+        self.base = base
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base + path, data=body, method=method)
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as resp:
+                resp.read()
+                status, headers = resp.status, resp.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            status, headers = e.code, e.headers
+        return status, time.perf_counter() - inicio, int(headers.get("X-Query-Count", 0))
+
+    def login(self):
+        status, _, _ = self.request("POST", "/login", {"usuario": BENCH_USER, "password": BENCH_PASSWORD})
+        if status != 302:
+            raise RuntimeError(f"No se pudo iniciar sesión en el benchmark (HTTP {status})")
+
+def escenarios(args):
+    # nombre -> (requiere sesión, función(cliente) -> [(status, segundos, consultas)])
+    producto = lambda: random.randint(1, max(args.productos, 1))
+    return {
+        "index": (False, lambda c: [c.request("GET", "/")]),
+        "tienda": (False, lambda c: [c.request("GET", "/tienda")]),
+        "juego": (False, lambda c: [c.request("GET", "/juego/half-life")]),
+        "comentarios": (True, lambda c: [c.request("GET", "/comentarios")]),
+        "carrito": (True, lambda c: [c.request("GET", "/carrito")]),
+        "login": (False, lambda c: [c.request("POST", "/login", {"usuario": BENCH_USER, "password": BENCH_PASSWORD})]),
+        "checkout": (True, lambda c: [c.request("POST", f"/carrito/agregar/{producto()}", {"cantidad": 1}),
+                                      c.request("POST", "/crear-sesion-checkout"),
+                                      c.request("GET", "/pedido-exitoso")]),
+    }
+
+def correr_escenario(base, nombre, con_sesion, fn, args):
+    muestras, errores = [], 0
+    lock = threading.Lock()
+    pendientes = [args.requests]
+
+    def cliente():
+        nonlocal errores
+        c = Cliente(base)
+        if con_sesion:
+            c.login()
+        while True:
+            with lock:
+                if pendientes[0] <= 0:
+                    return
+                pendientes[0] -= 1
+            for status, segundos, consultas in fn(c):
+                with lock:
+                    muestras.append((segundos, consultas))
+                    if status >= 400:
+                        errores += 1
+
+    # Calentamiento: llena cachés y el pool antes de medir
+    for _ in range(min(args.warmup, args.requests)):
+        c = Cliente(base)
+        if con_sesion:
+            c.login()
+        fn(c)
+
+    hilos = [threading.Thread(target=cliente) for _ in range(args.concurrency)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias = [m[0] for m in muestras]
+    consultas = [m[1] for m in muestras]
+    return {
+        "peticiones": len(muestras),
+        "errores": errores,
+        "duracion_s": round(duracion, 3),
+        "rps": round(len(muestras) / duracion, 2) if duracion else None,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+        "consultas_por_peticion": round(statistics.mean(consultas), 2),
+    }
+
+def comparar(actual, baseline):
+    print(f"\n{'escenario':<14}{'rps':>18}{'p95 ms':>20}{'consultas':>16}")
+    for nombre, r in actual["escenarios"].items():
+        b = baseline.get("escenarios", {}).get(nombre)
+        if not b:
+            continue
+        delta = lambda a, z: f"{z} -> {a}" if z is not None else str(a)
+        print(f"{nombre:<14}{delta(r['rps'], b['rps']):>18}{delta(r['p95_ms'], b['p95_ms']):>20}"
+              f"{delta(r['consultas_por_peticion'], b['consultas_por_peticion']):>16}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rutas principales de Echoes of Valve")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="peticiones por escenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--scenarios", default="index,tienda,juego,comentarios,carrito,login,checkout")
+    parser.add_argument("--productos", type=int, default=200)
+    parser.add_argument("--comentarios", type=int, default=20000)
+    parser.add_argument("--usuarios", type=int, default=1000)
+    parser.add_argument("--multimedia", type=int, default=500)
+    parser.add_argument("--reservas", type=int, default=2000)
+    parser.add_argument("--mysql-host", default=os.environ.get("MYSQL_HOST", "127.0.0.1"))
+    parser.add_argument("--mysql-port", type=int, default=int(os.environ.get("MYSQL_PORT", 3306)))
+    parser.add_argument("--mysql-user", default=os.environ.get("MYSQL_USER", "root"))
+    parser.add_argument("--mysql-password", default=os.environ.get("MYSQL_PASSWORD", ""))
+    parser.add_argument("--mysql-db", default="evalve_bench", help="se BORRA y se recrea")
+    parser.add_argument("--stripe-latency", type=float, default=0.05, help="latencia del Stripe falso (s)")
+    parser.add_argument("--output", help="guardar resultados en JSON")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    import fake_stripe
+
+    preparar_base(args)
+    stripe_port = free_port()
+    stripe = fake_stripe.serve(port=stripe_port, latencia=args.stripe_latency)
+    httpd, base = levantar_app(args, f"http://127.0.0.1:{stripe_port}")
+
+    resultados = {
+        "commit": git_commit(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("mysql_password", "output", "baseline")},
+        "escenarios": {},
+    }
+    todos = escenarios(args)
+    try:
+        for nombre in args.scenarios.split(","):
+            con_sesion, fn = todos[nombre.strip()]
+            r = correr_escenario(base, nombre, con_sesion, fn, args)
+            resultados["escenarios"][nombre] = r
+            print(f"{nombre:<14} {r['rps']:>8} rps  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                  f"p99 {r['p99_ms']:>8} ms  {r['consultas_por_peticion']:>5} q/pet  {r['errores']} errores")
+    finally:
+        httpd.shutdown()
+        stripe.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            comparar(resultados, json.load(f))
+
+if __name__ == "__main__":
+    main()
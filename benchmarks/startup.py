@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------------
+# Tiempo de arranque de un worker
+# ----------------------
+# Cada corrida es un proceso nuevo (como un worker recién creado): mide el
+# import de server.py, la creación de la app y la primera petición (/metrics,
+# que no toca la base de datos), y anota qué dependencias pesadas quedaron
+# cargadas. Con --ref compara contra otra revisión del repo (git archive).
+#
+#   python benchmarks/startup.py --runs 20
+#   python benchmarks/startup.py --ref HEAD~1
+PESADOS = ("MySQLdb", "stripe", "PIL", "wtforms", "flask_wtf", "email_validator")
+
+# Corre dentro del proceso hijo; las revisiones anteriores a create_app()
+# leen `config.AppConfig` y crean la app al importar server.py
+MEDIR = r"""
+import json, sys, time, types
+CONFIG = {"SECRET_KEY": "startup", "SESSION_BACKEND": "memory", "WTF_CSRF_ENABLED": False, "METRICS_TOKEN": "startup"}
+config = types.ModuleType("config")
+config.AppConfig = type("AppConfig", (), CONFIG)
+sys.modules["config"] = config
+inicio = time.perf_counter()
+try:
+    import server
+    importado = time.perf_counter()
+    app = server.create_app(CONFIG) if hasattr(server, "create_app") else server.app
+except Exception as e:
+    print(json.dumps({"error": f"{type(e).__name__}: {e}"}))
+    sys.exit(0)
+creada = time.perf_counter()
+status = app.test_client().get("/metrics", headers={"Authorization": "Bearer startup"}).status_code
+primera = time.perf_counter()
+print(json.dumps({"import": importado - inicio, "create_app": creada - importado,
+                  "primera_peticion": primera - creada, "status": status,
+                  "pesados": [m for m in PESADOS if m in sys.modules]}))
+"""
+
+def medir(directorio, runs):
+    codigo = f"PESADOS = {PESADOS!r}\n" + MEDIR
+    corridas = []
+    for _ in range(runs):
+        inicio = time.perf_counter()
+        salida = subprocess.run([sys.executable, "-c", codigo], cwd=directorio, capture_output=True, text=True)
+        total = time.perf_counter() - inicio
+        try:
+            dato = json.loads(salida.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            dato = {"error": salida.stderr.strip().splitlines()[-1] if salida.stderr.strip() else "sin salida"}
+        if "error" in dato:
+            return dato
+        dato["proceso"] = total
+        corridas.append(dato)
+    resumen = {k: statistics.median(c[k] for c in corridas) for k in ("import", "create_app", "primera_peticion", "proceso")}
+    resumen["pesados"] = corridas[-1]["pesados"]
+    resumen["status"] = corridas[-1]["status"]
+    return resumen
+
+def extraer(ref, destino):
+    # Copia de la revisión `ref` (sin tocar el árbol de trabajo)
+    tar = subprocess.run(["git", "archive", "--format=tar", ref], cwd=ROOT, capture_output=True, check=True).stdout
+    ruta = os.path.join(destino, "repo.tar")
+    with open(ruta, "wb") as f:
+        f.write(tar)
+    with tarfile.open(ruta) as t:
+        t.extractall(destino)
+    return destino
+
+def imprimir(nombre, r):
+    if "error" in r:
+        print(f"{nombre:<12} no arranca: {r['error']}")
+        return
+    print(f"{nombre:<12} import {r['import'] * 1000:7.1f} ms   create_app {r['create_app'] * 1000:7.1f} ms   "
+          f"1a petición {r['primera_peticion'] * 1000:7.1f} ms   proceso {r['proceso'] * 1000:7.1f} ms")
+    print(f"{'':<12} cargados al arrancar: {', '.join(r['pesados']) or 'ninguno'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la app en un proceso nuevo")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--ref", help="revisión de git contra la cual comparar")
+    parser.add_argument("--output", help="guardar el resultado en JSON")
+    args = parser.parse_args()
+
+    resultado = {"actual": medir(ROOT, args.runs)}
+    imprimir("actual", resultado["actual"])
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            resultado[args.ref] = medir(extraer(args.ref, tmp), args.runs)
+        imprimir(args.ref, resultado[args.ref])
+        antes, ahora = resultado[args.ref], resultado["actual"]
+        if "error" not in antes and "error" not in ahora:
+            print(f"\nArranque hasta la primera respuesta: {antes['proceso'] / ahora['proceso']:.2f}x más rápido")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2)
+
+if __name__ == "__main__":
+    main()
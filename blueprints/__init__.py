@@ -0,0 +1,28 @@
+from flask import url_for
+
+# ----------------------
+# Blueprints por área
+# ----------------------
+# auth (login/registro), wiki (home y juegos), tienda (catálogo y búsqueda),
+# carrito (carrito y pago), multimedia (subidas y comentarios) y admin
+# (productos, usuarios, exportación y estadísticas). Los endpoints llevan el
+# prefijo del blueprint: url_for('tienda.tienda'), url_for('auth.login').
+def register_blueprints(app):
+    from blueprints import auth, wiki, tienda, carrito, multimedia, admin
+    for modulo in (auth, wiki, tienda, carrito, multimedia, admin):
+        app.register_blueprint(modulo.bp)
+
+    # Plantillas que todavía piden url_for('tienda') sin el prefijo: se resuelve
+    # al único endpoint de algún blueprint con ese nombre
+    sin_prefijo = {}
+    for endpoint in app.view_functions:
+        if '.' in endpoint:
+            sin_prefijo.setdefault(endpoint.rsplit('.', 1)[1], []).append(endpoint)
+
+    def endpoint_sin_prefijo(error, endpoint, values):
+        candidatos = sin_prefijo.get(endpoint, [])
+        if len(candidatos) != 1:
+            return None
+        return url_for(candidatos[0], **values)
+
+    app.url_build_error_handlers.append(endpoint_sin_prefijo)
@@ -0,0 +1,257 @@
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify, Response
+import bulk
+from extensions import mysql, almacen, catalogo_cache, page_cache, buscador, hasher
+from db import dict_cursor, stream_cursor
+from pagination import page_size, keyset_by_id, parse_id_cursor
+from blueprints.helpers import (user_authenticated, login_required, role_required, respuesta_pagina,
+                                allowed_file, extension, generar_versiones)
+
+# ==================================================================
+# ADMINISTRACIÓN (Productos, Usuarios, Exportación, Estadísticas)
+# ==================================================================
+bp = Blueprint('admin', __name__)
+
+# --- Listados paginados ---
+COLUMNAS_PRODUCTO = "id, nombre, descripcion, precio, stock, imagen_url, imagen_thumb, imagen_medio"
+COLUMNAS_USUARIO = "id, nombre, apellidos, username, email, rol"
+
+def pagina_productos(limite, antes=None):
+    cursor = dict_cursor(mysql.connection)
+    try:
+        return keyset_by_id(cursor, COLUMNAS_PRODUCTO, "productos", limite, antes)
+    finally:
+        cursor.close()
+
+def pagina_usuarios(limite, despues=None):
+    cursor = dict_cursor(mysql.connection)
+    try:
+        return keyset_by_id(cursor, COLUMNAS_USUARIO, "regis", limite, despues, desc=False)
+    finally:
+        cursor.close()
+
+# --- Productos ---
+@bp.route('/admin/productos', methods=['GET', 'POST'])
+@login_required
+@role_required('admin')
+def admin_productos():
+    cursor = dict_cursor(mysql.connection)
+    if request.method == 'POST':
+        imagen_url_relativa = imagen_hash = None
+        escrito = False
+        try:
+            if 'imagen_file' in request.files:
+                file = request.files['imagen_file']
+                if file and file.filename != '' and allowed_file(file.filename):
+                    imagen_hash, imagen_url_relativa, escrito = almacen.put_stream(mysql.connection, file.stream, extension(file.filename))
+
+            cursor.execute("INSERT INTO productos (nombre, descripcion, precio, stock, imagen_url, imagen_hash) VALUES (%s, %s, %s, %s, %s, %s)",
+                (request.form['nombre'], request.form['descripcion'], request.form['precio'], request.form['stock'], imagen_url_relativa, imagen_hash))
+            mysql.connection.commit()
+            catalogo_cache.invalidate()
+            buscador.put('producto', cursor.lastrowid, nombre=request.form['nombre'], descripcion=request.form['descripcion'])
+            if imagen_url_relativa:
+                generar_versiones('productos', cursor.lastrowid, imagen_url_relativa)
+            flash('Producto agregado', 'success')
+        except Exception as e:
+            almacen.discard(imagen_url_relativa, escrito)
+            mysql.connection.rollback()
+            flash(f'Error: {str(e)}', 'error')
+        return redirect(url_for('admin.admin_productos'))
+
+    cursor.close()
+    productos, siguiente = pagina_productos(page_size())
+    return render_template('admin_productos.html', productos=productos, siguiente=siguiente, user_authenticated=user_authenticated())
+
+@bp.route('/admin/productos/mas')
+@login_required
+@role_required('admin')
+def admin_productos_mas():
+    productos, siguiente = pagina_productos(page_size(), parse_id_cursor(request.args.get('cursor')))
+    return respuesta_pagina(productos, siguiente)
+
+@bp.route('/admin/productos/editar/<int:id>', methods=['GET', 'POST'])
+@login_required
+@role_required('admin')
+def modificar_producto(id):
+    cursor = dict_cursor(mysql.connection)
+    if request.method == 'POST':
+        imagen_url = request.form['imagen_actual']
+        imagen_nueva = escrito = False
+        borrar = {}
+        try:
+            if 'imagen_file' in request.files:
+                file = request.files['imagen_file']
+                if file and file.filename != '' and allowed_file(file.filename):
+                    cursor.execute("SELECT imagen_hash FROM productos WHERE id = %s FOR UPDATE", (id,))
+                    anterior = (cursor.fetchone() or {}).get('imagen_hash')
+                    imagen_hash, imagen_url, escrito = almacen.put_stream(mysql.connection, file.stream, extension(file.filename))
+                    imagen_nueva = imagen_hash != anterior
+                    if imagen_nueva:
+                        # La imagen anterior se borra del disco solo si el commit pasa
+                        borrar = almacen.release(mysql.connection, anterior)
+                    else:
+                        # Misma imagen: se devuelve la referencia que se acaba de sumar
+                        almacen.release(mysql.connection, imagen_hash)
+
+            cursor.execute("UPDATE productos SET nombre=%s, descripcion=%s, precio=%s, stock=%s, imagen_url=%s WHERE id=%s",
+                (request.form['nombre'], request.form['descripcion'], request.form['precio'], request.form['stock'], imagen_url, id))
+            if imagen_nueva:
+                # Las versiones anteriores ya no aplican hasta que se generen las nuevas
+                cursor.execute("UPDATE productos SET imagen_hash=%s, imagen_thumb=NULL, imagen_medio=NULL WHERE id=%s", (imagen_hash, id))
+            mysql.connection.commit()
+            almacen.purge(mysql.connection, borrar)
+            catalogo_cache.invalidate()
+            buscador.put('producto', id, nombre=request.form['nombre'], descripcion=request.form['descripcion'])
+            if imagen_nueva:
+                generar_versiones('productos', id, imagen_url)
+            flash('Producto actualizado', 'success')
+        except Exception as e:
+            if imagen_nueva:
+                almacen.discard(imagen_url, escrito)
+            mysql.connection.rollback()
+            flash(f'Error: {str(e)}', 'error')
+        return redirect(url_for('admin.admin_productos'))
+
+    cursor.execute("SELECT * FROM productos WHERE id = %s", (id,))
+    producto = cursor.fetchone()
+    cursor.close()
+    return render_template('modificar_producto.html', producto=producto, user_authenticated=user_authenticated())
+
+@bp.route('/admin/productos/eliminar/<int:id>', methods=['POST'])
+@login_required
+@role_required('admin')
+def eliminar_producto(id):
+    cursor = mysql.connection.cursor()
+    cursor.execute("SELECT imagen_hash FROM productos WHERE id = %s FOR UPDATE", (id,))
+    fila = cursor.fetchone()
+    cursor.execute("DELETE FROM productos WHERE id = %s", (id,))
+    borrar = almacen.release(mysql.connection, fila[0]) if fila else {}
+    mysql.connection.commit()
+    cursor.close()
+    almacen.purge(mysql.connection, borrar)
+    catalogo_cache.invalidate()
+    buscador.delete('producto', id)
+    flash('Producto eliminado', 'success')
+    return redirect(url_for('admin.admin_productos'))
+
+# --- Exportación e importación masiva (ver bulk.py) ---
+@bp.route('/admin/exportar/<tabla>.<formato>')
+@login_required
+@role_required('admin')
+def exportar(tabla, formato):
+    if tabla not in bulk.EXPORTS or formato not in bulk.FORMATS:
+        return jsonify(error="Exportación no disponible"), 404
+    pool = mysql.pool
+
+    def generar():
+        # Conexión propia del pool con cursor del lado del servidor: las filas
+        # se leen y se mandan por bloques, sin cargar la tabla en memoria
+        with pool.connection() as conn:
+            cursor = stream_cursor(conn)
+            try:
+                yield from bulk.export_rows(cursor, tabla, formato)
+            finally:
+                cursor.close()
+
+    return Response(generar(), mimetype=bulk.FORMATS[formato],
+                    headers={'Content-Disposition': f'attachment; filename={tabla}.{formato}'})
+
+@bp.route('/admin/importar/<tabla>', methods=['POST'])
+@login_required
+@role_required('admin')
+def importar(tabla):
+    # Archivo .csv o .jsonl en el campo "archivo"; con parcial=1 se insertan
+    # las filas válidas aunque otras tengan errores. El tope de cuerpo de esta
+    # ruta es IMPORT_MAX_CONTENT_LENGTH (256 MB), no el MAX_CONTENT_LENGTH general
+    # (el proxy de enfrente también debe permitirlo)
+    request.max_content_length = current_app.config.get('IMPORT_MAX_CONTENT_LENGTH', 256 * 1024 * 1024)
+    archivo = request.files.get('archivo')
+    formato = archivo.filename.rsplit('.', 1)[-1].lower() if archivo and '.' in archivo.filename else None
+    if tabla not in bulk.IMPORTS or formato not in bulk.FORMATS:
+        return jsonify(error="Sube un archivo .csv o .jsonl de productos o regis"), 400
+    parcial = request.values.get('parcial') in ('1', 'true', 'on')
+    prepare = None
+    if tabla == 'regis':
+        # Los hashes se calculan en paralelo antes de abrir la transacción
+        def prepare(filas):
+            hashes = hasher.hash_many([f['password'] for f in filas])
+            return [{**f, 'password': h} for f, h in zip(filas, hashes)]
+    # Validar y hashear no ocupan conexión del pool; se pide recién para insertar
+    validadas = bulk.validate_rows(tabla, bulk.read_rows(archivo.stream, formato), parcial, prepare)
+    resultado = bulk.insert_rows(mysql.connection, validadas)
+    if resultado['insertadas'] and tabla == 'productos':
+        catalogo_cache.invalidate()
+        buscador.invalidate()
+    return jsonify(resultado), 200 if parcial or not resultado['errores'] else 422
+
+# --- Estadísticas ---
+@bp.route('/admin/cache')
+@login_required
+@role_required('admin')
+def cache_stats():
+    return jsonify(catalogo=catalogo_cache.stats(), paginas=page_cache.stats())
+
+@bp.route('/admin/almacen')
+@login_required
+@role_required('admin')
+def almacen_stats():
+    return jsonify(almacen.stats(mysql.connection))
+
+@bp.route('/admin/pool')
+@login_required
+@role_required('admin')
+def pool_stats():
+    return jsonify(mysql.pool.snapshot())
+
+# ==================================================================
+# GESTIÓN DE USUARIOS
+# ==================================================================
+
+@bp.route("/usuarios")
+@login_required
+@role_required('admin')
+def usuarios():
+    usuarios, siguiente = pagina_usuarios(page_size())
+    return render_template("usuarios.html", usuarios=usuarios, siguiente=siguiente, user_authenticated=user_authenticated())
+
+@bp.route("/usuarios/mas")
+@login_required
+@role_required('admin')
+def usuarios_mas():
+    usuarios, siguiente = pagina_usuarios(page_size(), parse_id_cursor(request.args.get('cursor')))
+    return respuesta_pagina(usuarios, siguiente, 'partials/usuario.html')
+
+@bp.route("/eliminar_usuario/<int:id>", methods=["POST"])
+@login_required
+@role_required('admin')
+def eliminar_usuario(id):
+    cursor = mysql.connection.cursor()
+    cursor.execute("DELETE FROM regis WHERE id = %s", (id,))
+    mysql.connection.commit()
+    flash("Usuario eliminado", "success")
+    cursor.close()
+    return redirect(url_for("admin.usuarios"))
+
+@bp.route("/modificar_usuario/<int:id>", methods=["GET", "POST"])
+@login_required
+@role_required('admin')
+def modificar_usuario(id):
+    cursor = dict_cursor(mysql.connection)
+    try:
+        if request.method == "POST":
+            cursor.execute("UPDATE regis SET nombre=%s, apellidos=%s, email=%s, rol=%s WHERE id=%s",
+                (request.form["nombre"], request.form["apellidos"], request.form["email"], request.form["rol"], id))
+            mysql.connection.commit()
+            flash("Usuario modificado", "success")
+            return redirect(url_for("admin.usuarios"))
+
+        cursor.execute("SELECT * FROM regis WHERE id = %s", (id,))
+        usuario = cursor.fetchone()
+
+        if not usuario:
+            flash("Usuario no encontrado", "error")
+            return redirect(url_for('admin.usuarios'))
+
+        return render_template("modificar_usuario.html", usuario=usuario, user_authenticated=user_authenticated())
+    finally:
+        cursor.close()
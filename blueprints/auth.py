@@ -0,0 +1,104 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, session, request
+from extensions import mysql, hasher, limite_auth_ip, limite_auth_usuario
+from db import dict_cursor
+from passwords import HashingBusy
+from blueprints.helpers import user_authenticated, login_required
+
+# ==================================================================
+# AUTENTICACIÓN
+# ==================================================================
+bp = Blueprint('auth', __name__)
+
+# Intentos de login/registro: por IP y por nombre de usuario
+def throttle_auth(usuario=None):
+    # Regresa los segundos a esperar, o 0 si el intento puede continuar
+    ok, espera = limite_auth_ip.hit(request.remote_addr)
+    if ok and usuario:
+        ok, espera = limite_auth_usuario.hit(usuario.lower())
+    return 0 if ok else max(1, int(espera + 0.999))
+
+def demasiados_intentos(template, espera, **context):
+    flash(f"Demasiados intentos. Espera {espera} segundos.", "error")
+    return render_template(template, user_authenticated=user_authenticated(), **context), 429, {'Retry-After': str(espera)}
+
+@bp.route("/login", methods=["GET", "POST"])
+def login():
+    # WTForms se importa con la primera petición de login/registro, no al arrancar
+    from forms import LoginForm
+    form = LoginForm()
+    if form.validate_on_submit():
+        usuario = form.usuario.data.strip()
+        password = form.password.data
+        espera = throttle_auth(usuario)
+        if espera:
+            return demasiados_intentos("login.html", espera, form=form)
+
+        cursor = dict_cursor(mysql.connection)
+        try:
+            cursor.execute("SELECT id, username, password, rol FROM regis WHERE username = %s", (usuario,))
+            user = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        try:
+            valido = bool(user) and hasher.verify(user["password"], password)
+        except HashingBusy:
+            flash("El servidor está ocupado, intenta de nuevo en unos segundos", "error")
+            return render_template("login.html", form=form, user_authenticated=user_authenticated()), 503, {'Retry-After': '5'}
+        if valido and hasher.needs_rehash(user["password"]):
+            # Oportunista: con el pool de hash lleno se deja para el siguiente
+            # login, la contraseña ya se verificó
+            try:
+                nuevo = hasher.hash(password)
+            except HashingBusy:
+                nuevo = None
+            if nuevo:
+                cursor = mysql.connection.cursor()
+                cursor.execute("UPDATE regis SET password = %s WHERE id = %s", (nuevo, user["id"]))
+                mysql.connection.commit()
+                cursor.close()
+
+        if valido:
+            if hasattr(session, "regenerate"):
+                session.regenerate()
+            session["logged_in"] = True
+            session["usuario"] = usuario
+            session["rol"] = user.get("rol", "usuario")
+            session.pop("carrito", None) # Limpiar carrito anterior
+            flash("Has iniciado sesión correctamente", "success")
+            return redirect(url_for("wiki.index"))
+        else:
+            flash("Usuario o contraseña incorrectos", "error")
+    return render_template("login.html", form=form, user_authenticated=user_authenticated())
+
+@bp.route("/register", methods=["GET", "POST"])
+def register():
+    from forms import RegisterForm
+    form = RegisterForm()
+    if form.validate_on_submit():
+        espera = throttle_auth()
+        if espera:
+            return demasiados_intentos("forms/register.html", espera, form=form)
+        try:
+            password = hasher.hash(form.usrpass.data)
+        except HashingBusy:
+            flash("El servidor está ocupado, intenta de nuevo en unos segundos", "error")
+            return render_template("forms/register.html", form=form, user_authenticated=user_authenticated()), 503, {'Retry-After': '5'}
+        try:
+            cursor = mysql.connection.cursor()
+            cursor.execute("INSERT INTO regis (nombre, apellidos, username, email, password, rol) VALUES (%s, %s, %s, %s, %s, %s)",
+                (form.usrname.data.strip(), form.usrln.data.strip(), form.usrn.data.strip(), form.usrmail.data.strip(), password, "usuario"))
+            mysql.connection.commit()
+            cursor.close()
+            flash("Registro exitoso", "success")
+            return redirect(url_for("auth.login"))
+        except Exception:
+            flash("El usuario o correo ya existe", "error")
+    return render_template("forms/register.html", form=form, user_authenticated=user_authenticated())
+
+@bp.route('/logout')
+@login_required
+def logout():
+    session.clear()
+    flash("Has cerrado sesión", "success")
+    return redirect(url_for('wiki.index'))
@@ -0,0 +1,168 @@
+import uuid
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, session, request
+import reservas
+from extensions import mysql, pagos, catalogo_cache, barrendero
+from db import dict_cursor
+from payments import PaymentUnavailable
+from blueprints.helpers import user_authenticated, login_required, admitir
+
+# ==================================================================
+# RUTAS DE CARRITO Y PAGO
+# ==================================================================
+bp = Blueprint('carrito', __name__)
+
+# --- Reservas de Inventario ---
+def liberar_reserva_actual():
+    token = session.pop('reserva', None)
+    if not token: return
+    if reservas.liberar(mysql.connection, token):
+        catalogo_cache.invalidate()
+    # Las filas liberadas conservan el token: si el carrito vuelve a quedar igual,
+    # el mismo nonce repetiría el token y el INSERT chocaría con ellas
+    terminar_checkout()
+
+def terminar_checkout():
+    # Nuevo intento de pago = nuevo token (y nueva Idempotency-Key)
+    session['checkout_nonce'] = uuid.uuid4().hex
+
+@bp.route('/carrito/agregar/<int:id>', methods=['POST'])
+@login_required
+@admitir('agregar_al_carrito')
+def agregar_al_carrito(id):
+    if 'carrito' not in session: session['carrito'] = {}
+    carrito = session['carrito']
+    pid = str(id)
+    cant = int(request.form.get('cantidad', 1))
+
+    # Validar stock
+    cursor = dict_cursor(mysql.connection)
+    cursor.execute("SELECT stock FROM productos WHERE id = %s", (pid,))
+    prod = cursor.fetchone()
+    cursor.close()
+
+    if prod and (carrito.get(pid, 0) + cant) <= prod['stock']:
+        carrito[pid] = carrito.get(pid, 0) + cant
+        session.modified = True
+        flash('Agregado al carrito', 'success')
+    else:
+        flash('No hay suficiente stock', 'error')
+    return redirect(url_for('tienda.tienda'))
+
+@bp.route('/carrito')
+@login_required
+def ver_carrito():
+    carrito = session.get('carrito', {})
+    ids = list(carrito.keys())
+    items = []
+    total = 0
+
+    if ids:
+        cursor = dict_cursor(mysql.connection)
+        format_strings = ','.join(['%s'] * len(ids))
+        cursor.execute(f"SELECT * FROM productos WHERE id IN ({format_strings})", tuple(ids))
+        productos = cursor.fetchall()
+        cursor.close()
+
+        for p in productos:
+            pid = str(p['id'])
+            c = carrito.get(pid, 0)
+            if c > 0:
+                sub = p['precio'] * c
+                items.append({**p, 'cantidad': c, 'subtotal': sub})
+                total += sub
+
+    return render_template('carrito.html', items_en_carrito=items, total=total, user_authenticated=user_authenticated())
+
+@bp.route('/carrito/eliminar/<int:id>', methods=['POST'])
+@login_required
+def eliminar_del_carrito(id):
+    pid = str(id)
+    if 'carrito' in session and pid in session['carrito']:
+        session['carrito'].pop(pid)
+        session.modified = True
+        flash('Eliminado del carrito', 'success')
+    return redirect(url_for('carrito.ver_carrito'))
+
+@bp.route('/crear-sesion-checkout', methods=['POST'])
+@login_required
+@admitir('crear_sesion_checkout')
+def crear_sesion_checkout():
+    carrito = session.get('carrito', {})
+    if not carrito: return redirect(url_for('carrito.ver_carrito'))
+    barrendero.start()
+
+    token = reservas.token_para(session.get('usuario'), carrito, session.get('checkout_nonce', ''))
+    if session.get('reserva') != token:
+        # El carrito cambió desde la última reserva: se devuelve antes de apartar otra
+        if session.get('reserva'):
+            liberar_reserva_actual()
+            token = reservas.token_para(session.get('usuario'), carrito, session['checkout_nonce'])
+        if not reservas.reservar(mysql.connection, token, session.get('usuario'), carrito,
+                                 current_app.config.get('RESERVA_TTL', 1800)):
+            flash('No hay suficiente stock para completar tu pedido', 'error')
+            return redirect(url_for('carrito.ver_carrito'))
+        session['reserva'] = token
+        catalogo_cache.invalidate()
+
+    ids = list(carrito.keys())
+    cursor = dict_cursor(mysql.connection)
+    format_strings = ','.join(['%s'] * len(ids))
+    cursor.execute(f"SELECT id, nombre, precio FROM productos WHERE id IN ({format_strings})", tuple(ids))
+    productos_db = cursor.fetchall()
+    cursor.close()
+
+    line_items = []
+    for p in productos_db:
+        c = carrito.get(str(p['id']), 0)
+        if c > 0:
+            line_items.append({
+                'price_data': {
+                    'currency': 'mxn',
+                    'product_data': {'name': p['nombre']},
+                    'unit_amount': int(p['precio'] * 100),
+                },
+                'quantity': c,
+            })
+
+    try:
+        # Los parámetros dependen solo del token: un reintento con la misma llave
+        # debe mandar exactamente lo mismo o Stripe lo rechaza
+        checkout_session = pagos.create_checkout_session(
+            f"checkout-{token}",
+            payment_method_types=['card'],
+            line_items=line_items,
+            mode='payment',
+            client_reference_id=token,
+            success_url=url_for('carrito.pedido_exitoso', _external=True),
+            cancel_url=url_for('carrito.pedido_cancelado', _external=True),
+        )
+        return redirect(checkout_session.url, code=303)
+    except PaymentUnavailable:
+        # La reserva se conserva: al reintentar se usa la misma llave y no se duplica la sesión
+        flash("El servicio de pago está saturado, intenta de nuevo en unos segundos", "error")
+        return redirect(url_for('carrito.ver_carrito'))
+    except Exception as e:
+        liberar_reserva_actual()
+        terminar_checkout()
+        flash(f"Error Stripe: {str(e)}", "error")
+        return redirect(url_for('carrito.ver_carrito'))
+
+@bp.route('/pedido-exitoso')
+@login_required
+def pedido_exitoso():
+    carrito = session.get('carrito', {})
+    token = session.pop('reserva', None)
+    terminar_checkout()
+    if carrito:
+        if not reservas.confirmar(mysql.connection, token, carrito):
+            flash('Algunos productos se agotaron mientras se procesaba tu pago', 'error')
+        catalogo_cache.invalidate()
+        session.pop('carrito', None)
+    return render_template('pedido_exitoso.html', user_authenticated=user_authenticated())
+
+@bp.route('/pedido-cancelado')
+@login_required
+def pedido_cancelado():
+    liberar_reserva_actual()
+    terminar_checkout()
+    return render_template('pedido_cancelado.html', user_authenticated=user_authenticated())
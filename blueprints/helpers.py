@@ -0,0 +1,111 @@
+from functools import wraps
+from flask import render_template, redirect, url_for, flash, session, request, jsonify, make_response
+from extensions import mysql, renditions, catalogo_cache, page_cache, admision
+from ratelimit import Rejected
+from pagination import serialize_row
+
+# --- Configuración de Subidas ---
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+VIDEO_EXTENSIONS = {'mp4', 'mov'}
+
+def extension(filename):
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else 'bin'
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+# --- Decoradores y Ayudas ---
+def user_authenticated():
+    return session.get("logged_in", False)
+
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not session.get("logged_in"):
+            flash("Debes iniciar sesión para acceder a esta página", "error")
+            return redirect(url_for("auth.login"))
+        return f(*args, **kwargs)
+    return decorated_function
+
+def role_required(role):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if session.get("rol") != role:
+                flash("No tienes permiso para acceder a esta página", "error")
+                return redirect(url_for("wiki.index"))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+# --- Control de Admisión ---
+def admitir(nombre, methods=("POST",)):
+    # Límites de ADMISSION_LIMITS[nombre] (ver server.py): cubeta por usuario
+    # (o IP sin sesión) y tope de peticiones simultáneas. Al pasarse se responde
+    # de inmediato, sin tocar la base de datos ni renderizar plantillas
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method not in methods:
+                return f(*args, **kwargs)
+            usuario = session.get("usuario")
+            key = f"u:{usuario}" if usuario else f"ip:{request.remote_addr}"
+            try:
+                with admision.admit(nombre, key):
+                    return f(*args, **kwargs)
+            except Rejected as e:
+                headers = {'Retry-After': str(e.retry_after), 'Cache-Control': 'no-store'}
+                if request.headers.get("X-Requested-With") == "fetch" or request.is_json:
+                    return jsonify(error=e.message, retry_after=e.retry_after), e.status, headers
+                return e.message, e.status, {**headers, 'Content-Type': 'text/plain; charset=utf-8'}
+        return decorated_function
+    return decorator
+
+# --- Caché de Páginas ---
+def render_cached(template, **context):
+    # Con mensajes flash pendientes la página es única: se renderiza normal
+    if session.get('_flashes'):
+        return render_template(template, **context)
+    # base.html cambia según sesión, rol y tamaño del carrito: todo eso va en la llave
+    key = (request.endpoint, tuple(sorted((request.view_args or {}).items())),
+           bool(user_authenticated()), session.get('rol'), len(session.get('carrito') or {}))
+    etag, body = page_cache.get_or_render(key, lambda: render_template(template, **context))
+    response = make_response(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache' if user_authenticated() else 'public, no-cache'
+    return response.make_conditional(request)
+
+# --- Listados paginados ---
+def respuesta_pagina(filas, siguiente, parcial=None):
+    # Respuesta de "cargar más": datos + (si hay parcial) el HTML ya renderizado
+    data = {"items": [serialize_row(f) for f in filas], "siguiente": siguiente}
+    if parcial:
+        data["html"] = render_template(parcial, filas=filas)
+    return jsonify(data)
+
+# --- Versiones de Imágenes ---
+# tabla -> (columna de la miniatura, columna de la versión mediana)
+COLUMNAS_VERSIONES = {'multimedia': ('ruta_thumb', 'ruta_medio'), 'productos': ('imagen_thumb', 'imagen_medio')}
+
+def guardar_versiones(conn, tabla, id, versiones):
+    columnas = COLUMNAS_VERSIONES[tabla]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"UPDATE {tabla} SET {columnas[0]} = %s, {columnas[1]} = %s WHERE id = %s",
+            (versiones.get('thumb'), versiones.get('medio'), id))
+        conn.commit()
+    finally:
+        cursor.close()
+
+def generar_versiones(tabla, id, ruta):
+    # El callback corre en el hilo del pipeline, sin contexto de app: se lleva
+    # el pool y la caché reales, no los proxies
+    pool, cache = mysql.pool, catalogo_cache._get_current_object()
+
+    def guardar(versiones):
+        with pool.connection() as conn:
+            guardar_versiones(conn, tabla, id, versiones)
+        if tabla == 'productos':
+            cache.invalidate()
+
+    renditions.submit(ruta, guardar)
@@ -0,0 +1,235 @@
+import os
+from flask import (Blueprint, current_app, render_template, redirect, url_for, flash, session, request,
+                   jsonify, Response, stream_with_context)
+from werkzeug.utils import secure_filename
+from extensions import mysql, subidas, almacen, buscador, feed_comentarios
+from db import dict_cursor
+from feed import FeedFull, sse
+from resumable import UploadError
+from media import send_media
+from pagination import page_size, split_page, keyset_by_id, parse_id_cursor, fecha_id_cursor, parse_fecha_id_cursor
+from blueprints.helpers import (user_authenticated, login_required, role_required, respuesta_pagina,
+                                extension, generar_versiones, admitir)
+
+# ==================================================================
+# MULTIMEDIA Y COMENTARIOS
+# ==================================================================
+bp = Blueprint('multimedia', __name__)
+
+# --- Listados paginados ---
+COLUMNAS_MULTIMEDIA = "id, tipo, nombre, ruta, ruta_thumb, ruta_medio, usuario, fecha"
+
+def pagina_multimedia(limite, antes=None):
+    cursor = dict_cursor(mysql.connection)
+    try:
+        return keyset_by_id(cursor, COLUMNAS_MULTIMEDIA, "multimedia", limite, antes)
+    finally:
+        cursor.close()
+
+def pagina_comentarios(limite, antes=None):
+    cursor = dict_cursor(mysql.connection)
+    try:
+        if antes:
+            cursor.execute("SELECT id, username, comentario, fecha FROM comentarios "
+                           "WHERE fecha < %s OR (fecha = %s AND id < %s) "
+                           "ORDER BY fecha DESC, id DESC LIMIT %s",
+                           (antes[0], antes[0], antes[1], limite + 1))
+        else:
+            cursor.execute("SELECT id, username, comentario, fecha FROM comentarios "
+                           "ORDER BY fecha DESC, id DESC LIMIT %s", (limite + 1,))
+        return split_page(cursor.fetchall(), limite, fecha_id_cursor)
+    finally:
+        cursor.close()
+
+@bp.route('/upload', methods=['GET', 'POST'])
+@login_required
+@admitir('upload')
+def upload():
+    cursor = dict_cursor(mysql.connection)
+    if request.method == 'POST':
+        if 'archivo' not in request.files: return redirect(request.url)
+        file = request.files['archivo']
+        if file.filename == '': return redirect(request.url)
+
+        filename = secure_filename(file.filename)
+        tipo = "video" if filename.lower().endswith(('.mp4', '.mov')) else "imagen"
+        # Si el contenido ya estaba guardado solo se suma una referencia, sin escribir a disco
+        digest, ruta, escrito = almacen.put_stream(mysql.connection, file.stream, extension(filename))
+        try:
+            cursor.execute("INSERT INTO multimedia (tipo, nombre, ruta, hash, usuario) VALUES (%s, %s, %s, %s, %s)",
+                (tipo, filename, ruta, digest, session.get("usuario")))
+            mysql.connection.commit()
+        except Exception:
+            almacen.discard(ruta, escrito)
+            mysql.connection.rollback()
+            raise
+        # Imágenes: miniatura y versión mediana; videos: poster
+        generar_versiones('multimedia', cursor.lastrowid, ruta)
+        flash("Archivo subido", "success")
+        return redirect(url_for('multimedia.upload'))
+
+    cursor.close()
+    multimedia, siguiente = pagina_multimedia(page_size())
+    return render_template("upload.html", multimedia=multimedia, siguiente=siguiente, user_authenticated=user_authenticated())
+
+@bp.route('/upload/mas')
+@login_required
+def upload_mas():
+    multimedia, siguiente = pagina_multimedia(page_size(), parse_id_cursor(request.args.get('cursor')))
+    return respuesta_pagina(multimedia, siguiente, 'partials/multimedia.html')
+
+@bp.route('/upload/video', methods=['POST'])
+@login_required
+@admitir('upload')
+def upload_video_crear():
+    data = request.get_json(silent=True) or {}
+    try:
+        state = subidas.create(data.get('nombre'), int(data.get('tamano', 0)), session.get('usuario'))
+    except (TypeError, ValueError):
+        return jsonify(error="Tamaño inválido"), 400
+    except UploadError as e:
+        return jsonify(error=e.message), e.status
+    return jsonify(id=state['id'], offset=0, maximo=subidas.max_bytes), 201
+
+@bp.route('/upload/video/<upload_id>', methods=['HEAD', 'PATCH', 'DELETE'])
+@login_required
+def upload_video(upload_id):
+    try:
+        state = subidas.get(upload_id)
+        if state['usuario'] != session.get('usuario'):
+            raise UploadError(404, "Subida no encontrada")
+
+        if request.method == 'HEAD':
+            return '', 200, {'Upload-Offset': str(state['offset']), 'Upload-Length': str(state['tamano']), 'Cache-Control': 'no-store'}
+        if request.method == 'DELETE':
+            subidas.cancel(upload_id)
+            return '', 204
+
+        offset = int(request.headers.get('Upload-Offset', -1))
+        state = subidas.append(upload_id, offset, request.stream, request.content_length)
+    except ValueError:
+        return jsonify(error="Upload-Offset inválido"), 400
+    except UploadError as e:
+        return jsonify(error=e.message), e.status
+
+    if state['completo']:
+        # Solo se registra en la base de datos cuando el archivo está completo
+        # El archivo terminado se mueve al almacén por contenido (o se descarta si ya existía)
+        digest, ruta, escrito = almacen.put_file(mysql.connection, os.path.join(subidas.dest_dir, state['filename']),
+                                                 extension(state['filename']))
+        cursor = mysql.connection.cursor()
+        try:
+            cursor.execute("INSERT INTO multimedia (tipo, nombre, ruta, hash, usuario) VALUES (%s, %s, %s, %s, %s)",
+                ("video", state['nombre'], ruta, digest, state['usuario']))
+            mysql.connection.commit()
+        except Exception:
+            almacen.discard(ruta, escrito)
+            mysql.connection.rollback()
+            raise
+        generar_versiones('multimedia', cursor.lastrowid, ruta)
+        cursor.close()
+    return jsonify(offset=state['offset'], completo=state['completo']), 200, {'Upload-Offset': str(state['offset'])}
+
+@bp.route('/media/<path:ruta>')
+def media(ruta):
+    # Originales de static/uploads con Range y ETag (ver media.py); igual de
+    # públicos que la ruta de estáticos
+    return send_media(current_app.static_folder, ruta, current_app.config.get('MEDIA_X_ACCEL_PREFIX'))
+
+@bp.route("/borrar_imagen/<int:id>", methods=["POST"])
+@login_required
+@role_required("admin")
+def borrar_imagen(id):
+    cursor = dict_cursor(mysql.connection)
+    cursor.execute("SELECT ruta, ruta_thumb, ruta_medio, hash FROM multimedia WHERE id = %s FOR UPDATE", (id,))
+    img = cursor.fetchone()
+    if img:
+        cursor.execute("DELETE FROM multimedia WHERE id = %s", (id,))
+        # El archivo solo se borra del disco cuando era su última referencia, y ya con el commit hecho
+        borrar = almacen.release(mysql.connection, img['hash']) if img['hash'] else {}
+        mysql.connection.commit()
+        if img['hash']:
+            almacen.purge(mysql.connection, borrar)
+        else:
+            # Subidas anteriores al almacén por contenido
+            for ruta in (img['ruta'], img['ruta_thumb'], img['ruta_medio']):
+                if not ruta: continue
+                path = os.path.join(current_app.static_folder, ruta)
+                if os.path.exists(path): os.remove(path)
+        flash("Eliminado", "success")
+    cursor.close()
+    return redirect(url_for("multimedia.upload"))
+
+@bp.route("/comentarios", methods=["GET", "POST"])
+@login_required
+@admitir('comentarios')
+def comentarios():
+    cursor = dict_cursor(mysql.connection)
+    if request.method == "POST":
+        cursor.execute("INSERT INTO comentarios (username, comentario) VALUES (%s, %s)",
+            (session.get("usuario"), request.form["comentario"]))
+        mysql.connection.commit()
+        buscador.put('comentario', cursor.lastrowid, comentario=request.form["comentario"], username=session.get("usuario"))
+        feed_comentarios.notify()
+        if request.headers.get("X-Requested-With") == "fetch":
+            # Publicado desde comentarios_vivo.js: el comentario llega por el feed, sin recargar la página
+            return jsonify(id=cursor.lastrowid), 201
+        flash("Comentario publicado", "success")
+        return redirect(url_for("multimedia.comentarios"))
+
+    cursor.close()
+    comentarios_db, siguiente = pagina_comentarios(page_size())
+    return render_template("comentarios.html", comentarios=comentarios_db, siguiente=siguiente, user_authenticated=user_authenticated())
+
+@bp.route("/comentarios/mas")
+@login_required
+def comentarios_mas():
+    comentarios_db, siguiente = pagina_comentarios(page_size(), parse_fecha_id_cursor(request.args.get('cursor')))
+    return respuesta_pagina(comentarios_db, siguiente, 'partials/comentario.html')
+
+@bp.route("/comentarios/stream")
+@login_required
+def comentarios_stream():
+    # EventSource manda Last-Event-ID al reconectar; la primera vez llega ?desde=
+    desde = request.headers.get("Last-Event-ID") or request.args.get("desde")
+    try:
+        desde = int(desde) if desde is not None else None
+    except ValueError:
+        desde = None
+    if feed_comentarios.full():
+        return jsonify(error="Demasiados clientes en el feed"), 503, {'Retry-After': '30'}
+    max_seconds = current_app.config.get('FEED_MAX_SECONDS', 300)
+
+    def generar():
+        yield sse(retry=5000, comment="feed")
+        try:
+            for filas in feed_comentarios.listen(desde, max_seconds=max_seconds):
+                if filas is None:
+                    # El cliente quedó muy atrás: mejor recargar la lista completa
+                    yield sse({}, event="recargar")
+                    return
+                if filas:
+                    # La lista muestra lo más nuevo arriba
+                    html = render_template('partials/comentario.html', filas=list(reversed(filas)))
+                    yield sse({"html": html}, event="comentarios", id=filas[-1]["id"])
+                else:
+                    yield sse(comment="ping")
+        except FeedFull:
+            yield sse({}, event="lleno")
+
+    response = Response(stream_with_context(generar()), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route("/borrar_comentario/<int:id>", methods=["POST"])
+@login_required
+@role_required("admin")
+def borrar_comentario(id):
+    cursor = mysql.connection.cursor()
+    cursor.execute("DELETE FROM comentarios WHERE id = %s", (id,))
+    mysql.connection.commit()
+    cursor.close()
+    buscador.delete('comentario', id)
+    flash("Comentario eliminado", "success")
+    return redirect(url_for("multimedia.comentarios"))
@@ -0,0 +1,34 @@
+from flask import Blueprint, render_template, request, jsonify
+from extensions import mysql, catalogo_cache, buscador
+from db import dict_cursor
+from pagination import page_size
+from blueprints.helpers import user_authenticated
+
+# ==================================================================
+# TIENDA Y BÚSQUEDA
+# ==================================================================
+bp = Blueprint('tienda', __name__)
+
+def cargar_catalogo():
+    cursor = dict_cursor(mysql.connection)
+    try:
+        cursor.execute("SELECT id, nombre, descripcion, precio, stock, imagen_url, imagen_thumb, imagen_medio FROM productos WHERE stock > 0")
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+@bp.route('/tienda')
+def tienda():
+    productos = catalogo_cache.get('tienda', cargar_catalogo)
+    return render_template('tienda.html', productos=productos, user_authenticated=user_authenticated())
+
+@bp.route('/buscar')
+def buscar():
+    # JSON para el typeahead: ?q=texto&tipo=producto|comentario&limite=10
+    # Los comentarios solo se muestran con sesión iniciada, igual que en /comentarios
+    permitidos = {'producto', 'comentario'} if user_authenticated() else {'producto'}
+    tipo = request.args.get('tipo')
+    tipos = permitidos & {tipo} if tipo else permitidos
+    q = request.args.get('q', '')[:100]
+    resultados = buscador.search(q, tipos=tipos, limit=page_size(default=10)) if tipos else []
+    return jsonify(q=q, resultados=resultados)
@@ -0,0 +1,32 @@
+from flask import Blueprint, redirect, url_for, flash
+from blueprints.helpers import user_authenticated, render_cached
+
+# ==================================================================
+# HOME Y WIKI
+# ==================================================================
+bp = Blueprint('wiki', __name__)
+
+@bp.route('/')
+def index():
+    return render_cached('index.html', user_authenticated=user_authenticated(), fondo="Fondo.gif")
+
+@bp.route('/juegos')
+def juegos():
+    return render_cached('juegos.html', user_authenticated=user_authenticated())
+
+@bp.route("/juego/<nombre>")
+def juego(nombre):
+    fondos = {
+        "half-life": "FondoHL.jpg", "cs": "FondoCS.jpg", "portal": "FondoPortal.jpg",
+        "tf2": "FondoTF2.jpg", "l4d": "FondoL4D.jpg", "l4d2": "FondoL4D2.jpg",
+        "dota2": "FondoDota2.jpg", "alyx": "FondoAlyx.jpg"
+    }
+    fondo = fondos.get(nombre, "Fondo.gif")
+
+    juegos_protegidos = ['l4d', 'l4d2', 'dota2', 'alyx']
+    if nombre in juegos_protegidos and not user_authenticated():
+        flash("Debes iniciar sesión para ver este contenido", "error")
+        return redirect(url_for('auth.login'))
+
+    juego_data = {"nombre": nombre, "titulo": nombre.replace('-', ' ').capitalize(), "descripcion": "Descripción..."}
+    return render_cached("juego.html", juego=juego_data, fondo=fondo, user_authenticated=user_authenticated())
@@ -0,0 +1,234 @@
+import csv
+import io
+import json
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+# ----------------------
+# Exportación e importación masiva
+# ----------------------
+# Exportar: las filas salen de un cursor del lado del servidor (SSCursor) y se
+# escriben en bloques, así la memoria no depende del tamaño de la tabla.
+# Importar: se validan todas las filas antes de tocar la base; las válidas se
+# insertan en lotes con un solo INSERT multi-fila, todo dentro de una
+# transacción. Los errores se reportan por número de fila.
+BATCH = 500
+FLUSH_ROWS = 500
+MAX_ERRORES = 200
+
+# Columnas que se exportan (nunca el hash de la contraseña)
+EXPORTS = {
+    "productos": ("id", "nombre", "descripcion", "precio", "stock", "imagen_url"),
+    "regis": ("id", "nombre", "apellidos", "username", "email", "rol"),
+    "multimedia": ("id", "tipo", "nombre", "ruta", "usuario", "fecha"),
+}
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+class BulkError(Exception):
+    pass
+
+def _valor(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    return v
+
+def export_rows(cursor, tabla, formato):
+    # Generador de trozos de texto; `cursor` debe ser un SSCursor ya abierto
+    columnas = EXPORTS[tabla]
+    cursor.execute(f"SELECT {', '.join(columnas)} FROM {tabla} ORDER BY id")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if formato == "csv" else None
+    if writer:
+        writer.writerow(columnas)
+    n = 0
+    for fila in cursor:
+        valores = [_valor(v) for v in fila]
+        if writer:
+            writer.writerow(valores)
+        else:
+            buffer.write(json.dumps(dict(zip(columnas, valores)), ensure_ascii=False) + "\n")
+        n += 1
+        if n % FLUSH_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# --- Validación ---
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def _texto(maximo, requerido=True):
+    def conv(v):
+        v = (v or "").strip()
+        if not v:
+            if requerido:
+                raise ValueError("es obligatorio")
+            return None
+        if len(v) > maximo:
+            raise ValueError(f"máximo {maximo} caracteres")
+        return v
+    return conv
+
+def _decimal(v):
+    try:
+        d = Decimal(str(v).strip())
+    except (InvalidOperation, AttributeError):
+        raise ValueError("no es un número")
+    if d < 0 or not d.is_finite():
+        raise ValueError("debe ser positivo")
+    return d.quantize(Decimal("0.01"))
+
+def _entero(v):
+    try:
+        n = int(str(v).strip())
+    except ValueError:
+        raise ValueError("no es un entero")
+    if n < 0:
+        raise ValueError("debe ser positivo")
+    return n
+
+def _email(v):
+    v = _texto(120)(v)
+    if not _EMAIL.match(v):
+        raise ValueError("no es un correo válido")
+    return v.lower()
+
+def _rol(v):
+    v = (v or "usuario").strip()
+    if v not in ("usuario", "admin"):
+        raise ValueError("debe ser 'usuario' o 'admin'")
+    return v
+
+def _password(v):
+    if not v or len(v) < 6:
+        raise ValueError("mínimo 6 caracteres")
+    return v
+
+# tabla -> [(columna, convertidor)]; el orden es el del INSERT
+IMPORTS = {
+    "productos": [("nombre", _texto(120)), ("descripcion", _texto(65535, requerido=False)),
+                  ("precio", _decimal), ("stock", _entero), ("imagen_url", _texto(255, requerido=False))],
+    "regis": [("nombre", _texto(50)), ("apellidos", _texto(50)), ("username", _texto(20)),
+              ("email", _email), ("password", _password), ("rol", _rol)],
+}
+# Columnas únicas que se verifican contra el archivo y contra la base
+UNIQUE = {"regis": ("username", "email")}
+
+def read_rows(stream, formato):
+    # (número de fila, dict) sin cargar el archivo completo
+    texto = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if formato == "csv":
+        for i, fila in enumerate(csv.DictReader(texto), start=2):  # la fila 1 es el encabezado
+            yield i, fila
+    else:
+        for i, linea in enumerate(texto, start=1):
+            if not linea.strip():
+                continue
+            try:
+                fila = json.loads(linea)
+            except ValueError:
+                yield i, None
+                continue
+            yield i, fila if isinstance(fila, dict) else None
+
+def _validar(tabla, fila):
+    if fila is None:
+        return None, ["fila con formato inválido"]
+    valores, errores = {}, []
+    for columna, conv in IMPORTS[tabla]:
+        try:
+            valores[columna] = conv(fila.get(columna))
+        except ValueError as e:
+            errores.append(f"{columna}: {e}")
+    return valores, errores
+
+def _existentes(cursor, tabla, columna, valores):
+    if not valores:
+        return set()
+    cursor.execute(f"SELECT {columna} FROM {tabla} WHERE {columna} IN ({','.join(['%s'] * len(valores))})",
+                   list(valores))
+    return {str(r[0]).lower() for r in cursor.fetchall()}
+
+def _insertar(cursor, tabla, lote):
+    columnas = [c for c, _ in IMPORTS[tabla]]
+    marcadores = "(" + ",".join(["%s"] * len(columnas)) + ")"
+    cursor.execute(f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES {','.join([marcadores] * len(lote))}",
+                   [f[c] for f in lote for c in columnas])
+
+def _registrar(estado, numero, mensajes):
+    estado["rechazadas"] += 1
+    if len(estado["errores"]) < MAX_ERRORES:
+        estado["errores"].append({"fila": numero, "errores": mensajes})
+
+def validate_rows(tabla, filas, parcial=False, prepare=None):
+    # Primera fase, sin tocar la base: valida el archivo completo (`filas`:
+    # iterable de (número, dict)) y deja las filas listas para insert_rows().
+    # `prepare(lista de filas válidas)` las ajusta y regresa la lista nueva
+    # (p. ej. hashear contraseñas, que es lento); corre antes de pedir una
+    # conexión, no dentro de la transacción.
+    if tabla not in IMPORTS:
+        raise BulkError(f"No se puede importar {tabla}")
+    unicas = UNIQUE.get(tabla, ())
+    vistos = {c: set() for c in unicas}
+    estado = {"tabla": tabla, "parcial": parcial, "filas": 0, "validas": [], "errores": [], "rechazadas": 0}
+
+    for numero, fila in filas:
+        estado["filas"] += 1
+        valores, mensajes = _validar(tabla, fila)
+        for columna in unicas:
+            if not mensajes:
+                clave = str(valores[columna]).lower()
+                if clave in vistos[columna]:
+                    mensajes.append(f"{columna}: repetido en el archivo")
+                vistos[columna].add(clave)
+        if mensajes:
+            _registrar(estado, numero, mensajes)
+            continue
+        estado["validas"].append((numero, valores))
+
+    # Si el archivo ya falló entero no vale la pena preparar nada: solo se
+    # buscan duplicados contra la base para completar el reporte
+    validas = estado["validas"]
+    if prepare and validas and (parcial or not estado["errores"]):
+        estado["validas"] = list(zip([n for n, _ in validas], prepare([v for _, v in validas])))
+    return estado
+
+def insert_rows(conn, estado):
+    # Segunda fase: duplicados contra la base e INSERT por lotes en una sola
+    # transacción. Sin `parcial`, cualquier error cancela todo; con `parcial`
+    # se insertan las válidas y se reportan las demás.
+    tabla, parcial, errores = estado["tabla"], estado["parcial"], estado["errores"]
+    unicas = UNIQUE.get(tabla, ())
+    validas, insertadas = estado["validas"], 0
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(validas), BATCH):
+            lote = validas[i:i + BATCH]
+            # Una consulta por columna única por lote
+            for columna in unicas:
+                ya = _existentes(cursor, tabla, columna, {v[columna] for _, v in lote})
+                for numero, v in lote:
+                    if str(v[columna]).lower() in ya:
+                        _registrar(estado, numero, [f"{columna}: ya existe"])
+                lote = [(n, v) for n, v in lote if str(v[columna]).lower() not in ya]
+            if lote and (parcial or not errores):
+                _insertar(cursor, tabla, [v for _, v in lote])
+                insertadas += len(lote)
+        if errores and not parcial:
+            conn.rollback()
+            insertadas = 0
+        else:
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return {"tabla": tabla, "filas": estado["filas"], "insertadas": insertadas, "rechazadas": estado["rechazadas"],
+            "errores": errores, "errores_truncados": estado["rechazadas"] > len(errores)}
+
+def import_rows(conn, tabla, filas, parcial=False, prepare=None):
+    return insert_rows(conn, validate_rows(tabla, filas, parcial, prepare))
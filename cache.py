@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# ----------------------
+# Caché versionada en memoria
+# ----------------------
+# Cada worker guarda sus propias entradas, pero todas comparten una "versión"
+# que vive en un archivo. Cualquier escritura (en cualquier worker) cambia la
+# versión y el resto de los workers descarta su copia en la siguiente lectura.
+class VersionedCache:
+    def __init__(self, version_file, ttl=60):
+        self.version_file = version_file
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (version, expira, valor)
+
+    def current_version(self):
+        try:
+            with open(self.version_file, encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def get(self, key, loader):
+        # La versión se lee ANTES de cargar: si alguien invalida mientras
+        # cargamos, la entrada queda con la versión vieja y se recarga después.
+        version = self.current_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] > now:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (version, now + self.ttl, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        # Un token único (no un contador) para que dos escrituras simultáneas
+        # nunca dejen la misma versión que ya leyó otro worker.
+        token = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex}"
+        tmp = f"{self.version_file}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(token)
+        os.replace(tmp, self.version_file)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+            }
+
+# ----------------------
+# Caché de páginas renderizadas
+# ----------------------
+# Páginas que solo dependen de unos pocos datos (juego, si hay sesión, rol...)
+# se renderizan una vez y se guardan con su ETag. LRU acotada porque la URL
+# /juego/<nombre> acepta cualquier nombre.
+class PageCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (etag, body)
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        body = render()
+        entry = (hashlib.sha256(body.encode("utf-8")).hexdigest()[:32], body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
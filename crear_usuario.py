@@ -1,14 +1,16 @@
-import mysql.connector
+import os
+import MySQLdb
 from werkzeug.security import generate_password_hash
+from db import create_mysql_pool
 
-# Conexión a la base de datos
-conn = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="",
-    database="evalve"
-)
-cursor = conn.cursor()
+# Conexión a la base de datos (mismo pool que usa server.py)
+pool = create_mysql_pool({
+    "MYSQL_HOST": os.environ.get("MYSQL_HOST", "localhost"),
+    "MYSQL_USER": os.environ.get("MYSQL_USER", "root"),
+    "MYSQL_PASSWORD": os.environ.get("MYSQL_PASSWORD", ""),
+    "MYSQL_DB": os.environ.get("MYSQL_DB", "evalve"),
+    "MYSQL_POOL_SIZE": 1,
+})
 
 # Datos del usuario de prueba
 usuario = "Mamor123"
@@ -16,14 +18,18 @@ password = generate_password_hash("1234")
 
 # Inserta el usuario
 try:
-    cursor.execute("""
-        INSERT INTO regis (nombre, apellidos, username, email, password)
-        VALUES (%s, %s, %s, %s, %s)
-    """, ("Celia", "Hernandez", usuario, "Mujer@test.com", password))
-    conn.commit()
-    print("Usuario de prueba creado correctamente.")
-except mysql.connector.IntegrityError:
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO regis (nombre, apellidos, username, email, password)
+                VALUES (%s, %s, %s, %s, %s)
+            """, ("Celia", "Hernandez", usuario, "Mujer@test.com", password))
+            conn.commit()
+            print("Usuario de prueba creado correctamente.")
+        finally:
+            cursor.close()
+except MySQLdb.IntegrityError:
     print("El usuario ya existe.")
 finally:
-    cursor.close()
-    conn.close()
+    pool.close()
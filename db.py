@@ -0,0 +1,276 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from flask import g
+
+# ----------------------
+# Pool de conexiones
+# ----------------------
+# Reutiliza conexiones entre peticiones en lugar de abrir una nueva (TCP + auth)
+# en cada una. `connect` es cualquier función que regrese una conexión DB-API,
+# así el mismo pool sirve para MySQLdb o para sqlite3 en pruebas.
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(self, connect, size=10, max_lifetime=1800, wait_timeout=5,
+                 ping_after=10, ping=None):
+        self._connect = connect
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.wait_timeout = wait_timeout
+        self.ping_after = ping_after  # segundos ociosa antes de verificarla al prestarla
+        self._ping = ping or (lambda conn: conn.ping())
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = deque()  # (conn, creada, devuelta)
+        self._meta = {}       # id(conn) -> creada
+        self.stats = {
+            "borrowed": 0, "created": 0, "recycled": 0, "health_failures": 0,
+            "waits": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+            "timeouts": 0, "in_use": 0,
+        }
+
+    def _new(self):
+        conn = self._connect()
+        with self._lock:
+            self.stats["created"] += 1
+            self._meta[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._meta.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        inicio = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            # Pool lleno: esperar con límite y registrar cuánto se esperó
+            ok = self._slots.acquire(timeout=self.wait_timeout)
+            espera = time.monotonic() - inicio
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds_total"] += espera
+                self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], espera)
+                if not ok:
+                    self.stats["timeouts"] += 1
+            if not ok:
+                raise PoolTimeout(f"Sin conexiones libres tras {self.wait_timeout}s")
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.stats["borrowed"] += 1
+            self.stats["in_use"] += 1
+        return conn
+
+    def _checkout(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                entry = self._idle.popleft() if self._idle else None
+            if entry is None:
+                return self._new()
+            conn, creada, devuelta = entry
+            if now - creada > self.max_lifetime:
+                with self._lock:
+                    self.stats["recycled"] += 1
+                self._discard(conn)
+                continue
+            if now - devuelta > self.ping_after:
+                try:
+                    self._ping(conn)
+                except Exception:
+                    with self._lock:
+                        self.stats["health_failures"] += 1
+                    self._discard(conn)
+                    continue
+            return conn
+
+    def release(self, conn, broken=False):
+        try:
+            if not broken:
+                try:
+                    # Cierra cualquier transacción abierta y suelta el snapshot de lectura
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            if broken:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    creada = self._meta.get(id(conn), time.monotonic())
+                    self._idle.append((conn, creada, time.monotonic()))
+        finally:
+            with self._lock:
+                self.stats["in_use"] -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception:
+            broken = not _is_healthy(conn, self._ping)
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["idle"] = len(self._idle)
+        data["size"] = self.size
+        return data
+
+def _is_healthy(conn, ping):
+    try:
+        ping(conn)
+        return True
+    except Exception:
+        return False
+
+# ----------------------
+# Conteo de consultas
+# ----------------------
+# Envoltorios delgados: cada execute/executemany avisa a `on_query` con la
+# sentencia y los segundos que tardó (también si falló).
+class CountingCursor:
+    def __init__(self, cursor, on_query):
+        self._cursor = cursor
+        self._on_query = on_query
+
+    def _timed(self, fn, query, args):
+        inicio = time.perf_counter()
+        try:
+            return fn(query, args)
+        finally:
+            self._on_query(query, time.perf_counter() - inicio)
+
+    def execute(self, query, args=None):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(self._cursor.executemany, query, args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+class CountingConnection:
+    def __init__(self, conn, on_query):
+        self._conn = conn
+        self._on_query = on_query
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._conn.cursor(*args, **kwargs), self._on_query)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+# ----------------------
+# MySQL
+# ----------------------
+def create_mysql_pool(config):
+    # Mismas claves que usaba flask_mysqldb (MYSQL_HOST, MYSQL_USER, ...)
+    def connect():
+        import MySQLdb
+        kwargs = {
+            "host": config.get("MYSQL_HOST", "localhost"),
+            "user": config.get("MYSQL_USER", "root"),
+            "passwd": config.get("MYSQL_PASSWORD", ""),
+            "db": config.get("MYSQL_DB", ""),
+            "port": int(config.get("MYSQL_PORT", 3306)),
+            "charset": config.get("MYSQL_CHARSET", "utf8mb4"),
+            "connect_timeout": int(config.get("MYSQL_CONNECT_TIMEOUT", 10)),
+        }
+        if config.get("MYSQL_UNIX_SOCKET"):
+            kwargs["unix_socket"] = config["MYSQL_UNIX_SOCKET"]
+        return MySQLdb.connect(**kwargs)
+
+    return ConnectionPool(
+        connect,
+        size=int(config.get("MYSQL_POOL_SIZE", 10)),
+        max_lifetime=float(config.get("MYSQL_POOL_MAX_LIFETIME", 1800)),
+        wait_timeout=float(config.get("MYSQL_POOL_WAIT_TIMEOUT", 5)),
+        ping_after=float(config.get("MYSQL_POOL_PING_AFTER", 10)),
+    )
+
+# Cursores de MySQLdb: el driver se importa al primer uso, no al importar la app
+def dict_cursor(conn):
+    from MySQLdb.cursors import DictCursor
+    return conn.cursor(DictCursor)
+
+def stream_cursor(conn):
+    # Del lado del servidor: las filas llegan conforme se leen
+    from MySQLdb.cursors import SSCursor
+    return conn.cursor(SSCursor)
+
+class PooledMySQL:
+    # Reemplazo de flask_mysqldb.MySQL: misma interfaz (`mysql.connection`),
+    # pero la conexión se toma del pool y se devuelve al cerrar el contexto.
+    def __init__(self, app=None, pool=None):
+        self.pool = pool
+        self._listeners = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.pool is None:
+            self.pool = create_mysql_pool(app.config)
+        app.teardown_appcontext(self.teardown)
+        if app.config.get("QUERY_COUNT_HEADER"):
+            # Para benchmarks: cuántas consultas hizo cada petición
+            app.after_request(self._query_count_header)
+
+    @property
+    def connection(self):
+        conn = g.get("_db_conn")
+        if conn is None:
+            conn = g._db_conn = CountingConnection(self.pool.acquire(), self._count)
+        return conn
+
+    def add_listener(self, fn):
+        # fn(query, segundos): se llama después de cada consulta (ver metrics.py)
+        self._listeners.append(fn)
+
+    def _count(self, query, seconds):
+        g._db_queries = g.get("_db_queries", 0) + 1
+        g._db_seconds = g.get("_db_seconds", 0.0) + seconds
+        for fn in self._listeners:
+            fn(query, seconds)
+
+    @staticmethod
+    def query_count():
+        return g.get("_db_queries", 0)
+
+    @staticmethod
+    def query_seconds():
+        return g.get("_db_seconds", 0.0)
+
+    def _query_count_header(self, response):
+        response.headers["X-Query-Count"] = str(self.query_count())
+        return response
+
+    def teardown(self, exception):
+        conn = g.pop("_db_conn", None)
+        if conn is not None:
+            conn = conn._conn
+            self.pool.release(conn, broken=exception is not None and not _is_healthy(conn, self.pool._ping))
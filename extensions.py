@@ -0,0 +1,28 @@
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+# ----------------------
+# Servicios compartidos
+# ----------------------
+# create_app() (server.py) arma cada servicio una vez por app y lo guarda en
+# app.extensions["evalve"]. Los blueprints los usan por medio de estos proxies,
+# que resuelven al servicio de la app actual; así cada prueba puede crear su
+# propia app sin estado global. Los hilos de fondo (feed, versiones, barrendero)
+# no tienen contexto de app: reciben el objeto real, no el proxy.
+def _servicio(nombre):
+    return LocalProxy(lambda: current_app.extensions["evalve"][nombre])
+
+mysql = _servicio("mysql")
+pagos = _servicio("pagos")
+subidas = _servicio("subidas")
+almacen = _servicio("almacen")
+renditions = _servicio("renditions")
+catalogo_cache = _servicio("catalogo_cache")
+page_cache = _servicio("page_cache")
+buscador = _servicio("buscador")
+feed_comentarios = _servicio("feed_comentarios")
+barrendero = _servicio("barrendero")
+hasher = _servicio("hasher")
+limite_auth_ip = _servicio("limite_auth_ip")
+limite_auth_usuario = _servicio("limite_auth_usuario")
+admision = _servicio("admision")
@@ -0,0 +1,106 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ----------------------
+# Stripe falso para pruebas locales
+# ----------------------
+# Responde a POST /v1/checkout/sessions como lo haría Stripe (respetando
+# Idempotency-Key) y GET /pay/<id> redirige al success_url, como si el pago
+# se hubiera completado. Uso:
+#   python fake_stripe.py --port 12111 --latencia 0.2
+# y en la configuración: STRIPE_API_BASE = "http://127.0.0.1:12111"
+class FakeStripe(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latencia=0.0):
+        super().__init__(address, Handler)
+        self.latencia = latencia
+        self.sesiones = {}
+        self.idempotencia = {}
+        self.lock = threading.Lock()
+        self.llamadas = 0
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/v1/checkout/sessions":
+            return self._json(404, {"error": {"message": "Unrecognized request URL", "type": "invalid_request_error"}})
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        server = self.server
+        if server.latencia:
+            time.sleep(server.latencia)
+
+        key = self.headers.get("Idempotency-Key")
+        with server.lock:
+            server.llamadas += 1
+            if key and key in server.idempotencia:
+                return self._json(200, server.idempotencia[key], {"Idempotent-Replayed": "true"})
+            sesion_id = f"cs_test_{uuid.uuid4().hex}"
+            host = self.headers.get("Host", f"127.0.0.1:{server.server_address[1]}")
+            sesion = {
+                "id": sesion_id,
+                "object": "checkout.session",
+                "mode": form.get("mode", ["payment"])[0],
+                "client_reference_id": form.get("client_reference_id", [None])[0],
+                "success_url": form.get("success_url", [""])[0],
+                "cancel_url": form.get("cancel_url", [""])[0],
+                "payment_status": "unpaid",
+                "status": "open",
+                "url": f"http://{host}/pay/{sesion_id}",
+            }
+            server.sesiones[sesion_id] = sesion
+            if key:
+                server.idempotencia[key] = sesion
+        self._json(200, sesion)
+
+    def do_GET(self):
+        partes = urlparse(self.path).path.strip("/").split("/")
+        if len(partes) == 2 and partes[0] == "pay" and partes[1] in self.server.sesiones:
+            sesion = self.server.sesiones[partes[1]]
+            sesion["payment_status"] = "paid"
+            sesion["status"] = "complete"
+            self.send_response(303)
+            self.send_header("Location", sesion["success_url"])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+def serve(host="127.0.0.1", port=12111, latencia=0.0):
+    server = FakeStripe((host, port), latencia)
+    hilo = threading.Thread(target=server.serve_forever, name="fake-stripe", daemon=True)
+    hilo.start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stripe falso para pruebas de carga locales")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos de espera por llamada")
+    args = parser.parse_args()
+    server = FakeStripe((args.host, args.port), args.latencia)
+    print(f"Stripe falso en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
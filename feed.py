@@ -0,0 +1,160 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+# ----------------------
+# Feed en vivo de comentarios (Server-Sent Events)
+# ----------------------
+# Un solo hilo por worker consulta "comentarios con id > último visto" y
+# reparte el resultado a todos los clientes conectados: N espectadores cuestan
+# una consulta por vuelta, no N lecturas de la tabla. El hilo solo corre
+# mientras hay alguien escuchando; `notify()` lo despierta al momento cuando
+# el comentario se publicó en este mismo worker.
+#
+# Cada conexión abierta ocupa un hilo del servidor: usar workers con hilos
+# (gunicorn -k gthread) y acotar con max_clients.
+class FeedFull(Exception):
+    pass
+
+class CommentFeed:
+    # `ultimo()` regresa el id más reciente; `nuevos(desde, limite)` las filas
+    # con id > desde en orden ascendente (dicts con al menos "id")
+    def __init__(self, ultimo, nuevos, interval=2.0, buffer=200, max_clients=100, idle_timeout=30):
+        self.ultimo = ultimo
+        self.nuevos = nuevos
+        self.interval = interval
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.polls = 0
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._buffer = deque(maxlen=buffer)
+        self._floor = 0      # ids <= floor ya no están en el buffer
+        self._last_id = 0
+        self._clients = 0
+        self._thread = None
+
+    def notify(self):
+        self._wake.set()
+
+    def _running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_running(self, ultimo, desde):
+        # Se llama con self._cond tomado; `ultimo` ya se consultó fuera del lock
+        if self._running():
+            return
+        # Arranque en frío: se empieza desde el último id actual, o desde el del
+        # cliente si está cerca (así no tiene que recargar por lo que se perdió)
+        if desde is not None and 0 <= ultimo - desde <= self._buffer.maxlen:
+            ultimo = desde
+        self._last_id = self._floor = ultimo
+        self._buffer.clear()
+        self._thread = threading.Thread(target=self._run, name="feed-comentarios", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        inactivo_desde = None
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._cond:
+                if not self._clients:
+                    inactivo_desde = inactivo_desde or time.monotonic()
+                    if time.monotonic() - inactivo_desde > self.idle_timeout:
+                        self._thread = None
+                        return
+                    continue
+                inactivo_desde = None
+                desde = self._last_id
+            try:
+                filas = self.nuevos(desde, self._buffer.maxlen)
+                self.polls += 1
+            except Exception:
+                log.exception("Error consultando comentarios nuevos")
+                continue
+            if not filas:
+                continue
+            with self._cond:
+                for fila in filas:
+                    if len(self._buffer) == self._buffer.maxlen:
+                        self._floor = self._buffer[0]["id"]
+                    self._buffer.append(fila)
+                self._last_id = filas[-1]["id"]
+                self._cond.notify_all()
+
+    def _after(self, desde):
+        # Filas del buffer con id > desde; None si el cliente quedó demasiado atrás
+        if desde < self._floor:
+            return None
+        filas = []
+        for fila in reversed(self._buffer):
+            if fila["id"] <= desde:
+                break
+            filas.append(fila)
+        filas.reverse()
+        return filas
+
+    def full(self):
+        # Revisión previa para responder 503 antes de abrir el stream
+        with self._cond:
+            return self._clients >= self.max_clients
+
+    def listen(self, desde, heartbeat=15, max_seconds=300):
+        # Generador: listas de filas nuevas, [] como latido, None si hay que recargar.
+        # Se corta a los max_seconds para no retener el hilo; EventSource reconecta solo.
+        with self._cond:
+            if self._clients >= self.max_clients:
+                raise FeedFull("Demasiados clientes en el feed")
+            self._clients += 1
+        try:
+            with self._cond:
+                arrancado = self._running()
+            if not arrancado:
+                # La consulta va sin el lock: no detiene a los demás clientes ni
+                # al hilo, y si falla el finally devuelve el lugar
+                ultimo = self.ultimo() or 0
+                with self._cond:
+                    self._ensure_running(ultimo, desde)
+            with self._cond:
+                if desde is None:
+                    desde = self._last_id
+            limite = time.monotonic() + max_seconds
+            while time.monotonic() < limite:
+                with self._cond:
+                    filas = self._after(desde)
+                    if filas == []:
+                        self._cond.wait(min(heartbeat, max(0, limite - time.monotonic())))
+                        filas = self._after(desde)
+                if filas is None:
+                    yield None
+                    return
+                if filas:
+                    desde = filas[-1]["id"]
+                yield filas
+        finally:
+            with self._cond:
+                self._clients -= 1
+
+    def stats(self):
+        with self._cond:
+            return {"clients": self._clients, "buffered": len(self._buffer), "last_id": self._last_id, "polls": self.polls}
+
+def sse(data=None, event=None, id=None, comment=None, retry=None):
+    # Un mensaje en formato text/event-stream
+    lineas = []
+    if comment:
+        lineas.append(f": {comment}")
+    if retry:
+        lineas.append(f"retry: {retry}")
+    if id is not None:
+        lineas.append(f"id: {id}")
+    if event:
+        lineas.append(f"event: {event}")
+    if data is not None:
+        lineas += [f"data: {l}" for l in json.dumps(data, default=str).splitlines()]
+    return "\n".join(lineas) + "\n\n"
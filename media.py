@@ -0,0 +1,53 @@
+import mimetypes
+import os
+import re
+from flask import Response, abort, send_from_directory
+from werkzeug.security import safe_join
+
+# ----------------------
+# Entrega de multimedia subida
+# ----------------------
+# Videos e imágenes originales de static/uploads con soporte de Range (el
+# navegador pide solo el tramo al que se adelanta), ETag/Last-Modified y 304.
+# El envío usa wsgi.file_wrapper: Gunicorn lo manda con sendfile() sin copiar
+# el archivo a Python. Detrás de Nginx, con MEDIA_X_ACCEL_PREFIX la app solo
+# responde las cabeceras y Nginx entrega el archivo (X-Accel-Redirect, con una
+# location `internal` que apunte a static/); con USE_X_SENDFILE lo mismo para
+# Apache/lighttpd.
+#
+# Los archivos del almacén por contenido (uploads/cas/) nunca cambian: su ETag
+# es el SHA-256 del nombre y se cachean un año como inmutables.
+PREFIX = "uploads/"
+ONE_YEAR = 365 * 24 * 3600
+_CAS = re.compile(r"^uploads/cas/(?:[0-9a-f]{2}/){2}([0-9a-f]{64})\.\w+$")
+
+MIMETYPES = {"mp4": "video/mp4", "mov": "video/quicktime", "webm": "video/webm"}
+
+def mimetype(ruta):
+    ext = ruta.rsplit(".", 1)[-1].lower()
+    return MIMETYPES.get(ext) or mimetypes.guess_type(ruta)[0] or "application/octet-stream"
+
+def send_media(static_root, ruta, accel_prefix=None):
+    # `ruta` relativa a static/ (multimedia.ruta). Nada fuera de uploads/, ni
+    # ocultos o a medio escribir (.tmp del almacén, .part de subidas por partes)
+    nombre = ruta.rsplit("/", 1)[-1]
+    if not ruta.startswith(PREFIX) or nombre.startswith(".") or nombre.endswith((".part", ".tmp")):
+        abort(404)
+    cas = _CAS.match(ruta)
+    if accel_prefix:
+        path = safe_join(static_root, ruta)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = Response(mimetype=mimetype(ruta))
+        # Range, ETag y 304 los resuelve Nginx sobre el archivo
+        response.headers["X-Accel-Redirect"] = accel_prefix.rstrip("/") + "/" + ruta
+    else:
+        response = send_from_directory(static_root, ruta, mimetype=mimetype(ruta), conditional=True,
+                                       etag=cas.group(1) if cas else True, max_age=ONE_YEAR if cas else 0)
+    if cas:
+        response.headers["Cache-Control"] = f"public, max-age={ONE_YEAR}, immutable"
+    else:
+        # Subidas anteriores al almacén: el nombre puede reutilizarse, se revalida siempre
+        response.headers["Cache-Control"] = "public, no-cache"
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
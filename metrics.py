@@ -0,0 +1,231 @@
+import hmac
+import logging
+import re
+import threading
+import time
+from flask import Response, abort, g, request
+
+log = logging.getLogger(__name__)
+
+# ----------------------
+# Métricas (formato de texto de Prometheus)
+# ----------------------
+# Sin dependencias: contadores e histogramas en memoria del worker, y
+# "colectores" (funciones que regresan valores al momento del scrape) para las
+# estadísticas que ya llevan el pool, las cachés y los limitadores. Con varios
+# workers de Gunicorn cada uno expone lo suyo; Prometheus los suma.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pares = list(zip(names, values)) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pares) + "}"
+
+def _num(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {_num(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._lock = threading.Lock()
+        self._values = {}  # labels -> [conteos por bucket, suma, total]
+
+    def observe(self, value, *labels):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if value <= limite:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (conteos, suma, total) in sorted(self._values.items()):
+                acumulado = 0
+                for limite, n in zip(self.buckets, conteos):
+                    acumulado += n
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', _num(limite))])} {acumulado}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_num(suma)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {total}")
+        return lines
+
+# --- Forma de las consultas ---
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+def sql_shape(query):
+    # Literales a ?, listas IN (%s, %s, ...) a (...), espacios colapsados: todas
+    # las variantes de la misma sentencia caen en una sola serie
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    shape = _STRING.sub("?", query)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(...)", shape)
+    return _SPACES.sub(" ", shape).strip()[:300]
+
+class SlowQueries:
+    # Muestras de las consultas lentas agrupadas por forma, con tope de formas
+    def __init__(self, threshold=0.2, max_shapes=50):
+        self.threshold = threshold
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._shapes = {}  # forma -> {"count", "total_seconds", "max_seconds", "endpoint"}
+
+    def record(self, query, seconds, endpoint):
+        if seconds < self.threshold:
+            return
+        shape = sql_shape(query)
+        log.warning("Consulta lenta (%.3fs) en %s: %s", seconds, endpoint, shape)
+        with self._lock:
+            entry = self._shapes.get(shape)
+            if entry is None:
+                if len(self._shapes) >= self.max_shapes:
+                    # Se descarta la forma menos costosa para hacer lugar
+                    menor = min(self._shapes, key=lambda k: self._shapes[k]["total_seconds"])
+                    if self._shapes[menor]["total_seconds"] > seconds:
+                        return
+                    del self._shapes[menor]
+                entry = self._shapes[shape] = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "endpoint": endpoint}
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["endpoint"] = endpoint
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(({"sql": k, **v} for k, v in self._shapes.items()),
+                          key=lambda e: e["total_seconds"], reverse=True)
+
+    def render(self, name="evalve_slow_query"):
+        lines = [f"# HELP {name}_seconds_total Tiempo acumulado de consultas lentas por forma",
+                 f"# TYPE {name}_seconds_total counter"]
+        muestras = self.snapshot()
+        for e in muestras:
+            lines.append(f"{name}_seconds_total{_labels(('endpoint', 'sql'), (e['endpoint'], e['sql']))} {_num(e['total_seconds'])}")
+        lines += [f"# HELP {name}_count_total Consultas lentas por forma", f"# TYPE {name}_count_total counter"]
+        for e in muestras:
+            lines.append(f"{name}_count_total{_labels(('endpoint', 'sql'), (e['endpoint'], e['sql']))} {e['count']}")
+        return lines
+
+# --- Registro ---
+class Metrics:
+    def __init__(self, app=None, mysql=None):
+        self.requests = Histogram("evalve_request_seconds", "Latencia de peticiones por ruta",
+                                  ("endpoint", "method", "status"))
+        self.queries = Histogram("evalve_request_queries", "Consultas SQL por petición",
+                                 ("endpoint",), QUERY_BUCKETS)
+        self.query_seconds = Histogram("evalve_query_seconds", "Duración de cada consulta SQL", ("endpoint",))
+        self.chatty = Counter("evalve_request_query_limit_exceeded_total",
+                              "Peticiones que pasaron de METRICS_MAX_QUERIES consultas", ("endpoint",))
+        self.slow = SlowQueries()
+        self.max_queries = 20
+        self.token = None
+        self._collectors = []  # (nombre, ayuda, tipo, función -> {etiqueta: valor} o número)
+        if app is not None:
+            self.init_app(app, mysql)
+
+    def init_app(self, app, mysql=None):
+        self.max_queries = app.config.get("METRICS_MAX_QUERIES", 20)
+        self.slow.threshold = app.config.get("METRICS_SLOW_QUERY_SECONDS", 0.2)
+        self.token = app.config.get("METRICS_TOKEN")
+        if not self.token:
+            log.info("METRICS_TOKEN sin configurar: /metrics responde 404")
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule("/metrics", "metrics", self.view)
+        if mysql is not None:
+            mysql.add_listener(self._on_query)
+
+    def collector(self, name, help, fn, type="gauge", label="key"):
+        # fn() regresa un número o un dict {valor de la etiqueta: número}; con
+        # varias etiquetas (label=("route", "stat")) las llaves son tuplas
+        labels = (label,) if isinstance(label, str) else tuple(label)
+        self._collectors.append((name, help, type, labels, fn))
+
+    def _start(self):
+        g._metrics_start = time.perf_counter()
+
+    def _on_query(self, query, seconds):
+        endpoint = request.endpoint if request else "fuera_de_peticion"
+        self.query_seconds.observe(seconds, endpoint or "404")
+        self.slow.record(query, seconds, endpoint or "404")
+
+    def _finish(self, response):
+        inicio = g.pop("_metrics_start", None)
+        if inicio is None or request.endpoint == "metrics":
+            return response
+        endpoint = request.endpoint or "404"
+        self.requests.observe(time.perf_counter() - inicio, endpoint, request.method, response.status_code)
+        consultas = g.get("_db_queries", 0)
+        self.queries.observe(consultas, endpoint)
+        if consultas > self.max_queries:
+            self.chatty.inc(endpoint)
+            log.warning("%s %s hizo %s consultas (límite %s, %.3fs en SQL)", request.method, request.path,
+                        consultas, self.max_queries, g.get("_db_seconds", 0.0))
+        return response
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.queries, self.query_seconds, self.chatty):
+            lines += metric.render()
+        lines += self.slow.render()
+        for name, help, type, labels, fn in self._collectors:
+            try:
+                value = fn()
+            except Exception:
+                log.exception("Error leyendo la métrica %s", name)
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+            if isinstance(value, dict):
+                for key, v in sorted(value.items()):
+                    lines.append(f"{name}{_labels(labels, key if len(labels) > 1 else (key,))} {_num(v)}")
+            else:
+                lines.append(f"{name} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        # Se exige `Authorization: Bearer <METRICS_TOKEN>`. Sin token configurado
+        # la ruta no existe: expone latencias y la forma de las consultas lentas,
+        # y detrás de un proxy local no se puede confiar en que la IP sea la del cliente
+        if not self.token:
+            abort(404)
+        enviado = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(enviado.encode(), self.token.encode()):
+            abort(403)
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import re
+
+# ----------------------
+# Migraciones del esquema
+# ----------------------
+# Cada archivo migrations/NNNN_nombre.sql se aplica una sola vez, en orden, y
+# queda registrado en `schema_migrations` con su checksum. En MySQL los DDL no
+# son transaccionales: cada migración se registra justo después de aplicarse,
+# así una falla a la mitad se corrige y se vuelve a correr desde ahí.
+#
+#   flask migrar                  # aplica las pendientes
+#   flask migrar --solo-marcar 4  # base ya creada a mano: marca 0001-0004 como aplicadas
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+class MigrationError(Exception):
+    pass
+
+def discover(directory=DIRECTORY):
+    # [(versión, nombre, ruta)] ordenadas por versión
+    migraciones = []
+    for archivo in sorted(os.listdir(directory)):
+        m = _ARCHIVO.match(archivo)
+        if m:
+            migraciones.append((int(m.group(1)), m.group(2), os.path.join(directory, archivo)))
+    versiones = [v for v, _, _ in migraciones]
+    if len(versiones) != len(set(versiones)):
+        raise MigrationError("Hay dos migraciones con el mismo número")
+    return migraciones
+
+def statements(sql):
+    # Separa por ";" al final de línea, sin comentarios de línea completa
+    lineas = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lineas), flags=re.M) if s.strip()]
+
+def _checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _ensure_table(cursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                   "version INT NOT NULL PRIMARY KEY, "
+                   "nombre VARCHAR(100) NOT NULL, "
+                   "checksum CHAR(64) NOT NULL, "
+                   "aplicada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)")
+
+def applied(conn):
+    cursor = conn.cursor()
+    try:
+        _ensure_table(cursor)
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+def pending(conn, directory=DIRECTORY):
+    hechas = applied(conn)
+    for version, nombre, path in discover(directory):
+        if version in hechas and hechas[version] != _checksum(path):
+            raise MigrationError(f"La migración {version:04d}_{nombre} cambió después de aplicarse")
+    return [m for m in discover(directory) if m[0] not in hechas]
+
+def migrate(conn, directory=DIRECTORY, only_mark=None, log=print):
+    # Aplica (o con only_mark=N solo registra hasta la N) las migraciones pendientes
+    aplicadas = []
+    cursor = conn.cursor()
+    try:
+        for version, nombre, path in pending(conn, directory):
+            marcar = only_mark is not None and version <= only_mark
+            if only_mark is not None and not marcar:
+                break
+            if not marcar:
+                with open(path, encoding="utf-8") as f:
+                    for sentencia in statements(f.read()):
+                        cursor.execute(sentencia)
+            cursor.execute("INSERT INTO schema_migrations (version, nombre, checksum) VALUES (%s, %s, %s)",
+                           (version, nombre, _checksum(path)))
+            conn.commit()
+            log(f"{'Marcada' if marcar else 'Aplicada'} {version:04d}_{nombre}")
+            aplicadas.append(version)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return aplicadas
@@ -0,0 +1,8 @@
+-- Rutas de las versiones reducidas (miniatura y mediana) de cada imagen
+ALTER TABLE multimedia
+    ADD COLUMN ruta_thumb VARCHAR(255) NULL AFTER ruta,
+    ADD COLUMN ruta_medio VARCHAR(255) NULL AFTER ruta_thumb;
+
+ALTER TABLE productos
+    ADD COLUMN imagen_thumb VARCHAR(255) NULL AFTER imagen_url,
+    ADD COLUMN imagen_medio VARCHAR(255) NULL AFTER imagen_thumb;
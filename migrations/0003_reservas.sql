@@ -0,0 +1,13 @@
+-- Reservas de inventario (apartado de stock durante el pago)
+CREATE TABLE IF NOT EXISTS reservas (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    token CHAR(32) NOT NULL,
+    producto_id INT NOT NULL,
+    cantidad INT NOT NULL,
+    estado ENUM('activa', 'confirmada', 'liberada') NOT NULL DEFAULT 'activa',
+    usuario VARCHAR(50),
+    creada DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira DATETIME NOT NULL,
+    UNIQUE KEY uq_reservas_token_producto (token, producto_id),
+    KEY idx_reservas_estado_expira (estado, expira)
+);
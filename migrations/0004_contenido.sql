@@ -0,0 +1,16 @@
+-- Archivos subidos, direccionados por su SHA-256, con conteo de referencias
+CREATE TABLE IF NOT EXISTS archivos (
+    hash CHAR(64) NOT NULL PRIMARY KEY,
+    ruta VARCHAR(255) NOT NULL,
+    tamano BIGINT NOT NULL,
+    refs INT NOT NULL DEFAULT 1,
+    creado DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE multimedia
+    ADD COLUMN hash CHAR(64) NULL AFTER ruta_medio,
+    ADD KEY idx_multimedia_hash (hash);
+
+ALTER TABLE productos
+    ADD COLUMN imagen_hash CHAR(64) NULL AFTER imagen_medio,
+    ADD KEY idx_productos_imagen_hash (imagen_hash);
@@ -0,0 +1,19 @@
+-- Índices para las consultas frecuentes (ver benchmarks/explain.py)
+-- regis.username (login) y regis.email ya son UNIQUE desde 0001.
+
+-- Listado y "cargar más" de comentarios: ORDER BY fecha DESC, id DESC con cursor (fecha, id)
+ALTER TABLE comentarios
+    ADD KEY idx_comentarios_fecha_id (fecha, id);
+
+-- Tienda: productos con stock > 0
+ALTER TABLE productos
+    ADD KEY idx_productos_stock (stock),
+    ADD CONSTRAINT chk_productos_stock CHECK (stock >= 0),
+    ADD CONSTRAINT chk_productos_precio CHECK (precio >= 0);
+
+-- Versiones pendientes de generar (flask generar-versiones)
+ALTER TABLE multimedia
+    ADD KEY idx_multimedia_tipo_thumb (tipo, ruta_thumb);
+
+ALTER TABLE archivos
+    ADD CONSTRAINT chk_archivos_refs CHECK (refs >= 0);
@@ -0,0 +1,63 @@
+from datetime import datetime
+from decimal import Decimal
+from flask import request
+
+# ----------------------
+# Paginación por cursor (keyset)
+# ----------------------
+# En vez de OFFSET, cada página arranca donde terminó la anterior
+# (WHERE id < ultimo_id), así el costo no crece con la tabla.
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def page_size(default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        n = int(request.args.get("limite", default))
+    except (TypeError, ValueError):
+        n = default
+    return max(1, min(n, maximum))
+
+def split_page(rows, limit, key):
+    # Se piden limit + 1 filas: si sobra una, hay siguiente página
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, key(rows[-1])
+    return rows, None
+
+def keyset_by_id(cursor, columns, table, limit, after=None, desc=True):
+    op, order = ("<", "DESC") if desc else (">", "ASC")
+    where = f"WHERE id {op} %s " if after is not None else ""
+    params = ((after,) if after is not None else ()) + (limit + 1,)
+    cursor.execute(f"SELECT {columns} FROM {table} {where}ORDER BY id {order} LIMIT %s", params)
+    return split_page(cursor.fetchall(), limit, lambda row: str(row["id"]))
+
+# --- Cursores ---
+def parse_id_cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def fecha_id_cursor(row):
+    return f"{row['fecha'].isoformat()}_{row['id']}"
+
+def parse_fecha_id_cursor(value):
+    if not value:
+        return None
+    fecha, _, id_ = value.rpartition("_")
+    try:
+        return datetime.fromisoformat(fecha), int(id_)
+    except ValueError:
+        return None
+
+# --- JSON ---
+def serialize_row(row):
+    out = {}
+    for k, v in row.items():
+        if isinstance(v, datetime):
+            v = v.isoformat()
+        elif isinstance(v, Decimal):
+            v = str(v)
+        out[k] = v
+    return out
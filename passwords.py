@@ -0,0 +1,98 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# ----------------------
+# Hash de contraseñas fuera del worker
+# ----------------------
+# scrypt/pbkdf2 son lentos a propósito. Se calculan en un pool pequeño de
+# procesos con un tope de trabajos pendientes: si una ráfaga de logins lo
+# llena, las peticiones extra se rechazan al momento (HashingBusy) y el resto
+# del sitio sigue respondiendo. Con workers=0 todo corre en línea (desarrollo).
+class HashingBusy(Exception):
+    pass
+
+def _method_of(pwhash):
+    return pwhash.split("$", 1)[0]
+
+class PasswordHasher:
+    def __init__(self, method="scrypt", workers=2, max_pending=8, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._canonical = None
+
+    def _pool(self):
+        # Se crea al primer uso, ya dentro del worker (después del fork de Gunicorn).
+        # Para entonces ya hay hilos (barrendero, feed, pool de MySQL): un fork()
+        # copiaría locks tomados por ellos y el hijo podría colgarse. forkserver
+        # (o spawn donde no existe) arranca los procesos desde un intérprete limpio.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                         mp_context=multiprocessing.get_context(metodo))
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy("Demasiadas verificaciones de contraseña en curso")
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy("La verificación de contraseña tardó demasiado")
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        # Importaciones masivas: los hashes van en paralelo, con a lo más
+        # `workers` trabajos propios a la vez. En vez de fallar con HashingBusy
+        # se espera a que haya lugar, y los logins conservan el resto de los lugares.
+        if not self.workers:
+            return [generate_password_hash(p, self.method) for p in passwords]
+        propios = threading.Semaphore(self.workers)
+
+        def liberar(_):
+            self._slots.release()
+            propios.release()
+
+        futures = []
+        for password in passwords:
+            propios.acquire()
+            self._slots.acquire()
+            try:
+                future = self._pool().submit(generate_password_hash, password, self.method)
+            except Exception:
+                liberar(None)
+                raise
+            future.add_done_callback(liberar)
+            futures.append(future)
+        return [f.result() for f in futures]
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        # "scrypt" se expande a "scrypt:32768:8:1": se obtiene la forma completa
+        # una vez, con un hash desechable, y se compara contra el prefijo guardado
+        if self._canonical is None:
+            self._canonical = _method_of(generate_password_hash("", self.method, salt_length=1))
+        return _method_of(pwhash) != self._canonical
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# ----------------------
+# Pasarela de Stripe
+# ----------------------
+# Las llamadas a Stripe corren en un pool acotado de hilos con timeouts
+# estrictos. Si el pool ya está lleno no se encola nada: se responde de
+# inmediato que el servicio está ocupado en vez de amarrar otro worker.
+# Los reintentos (con backoff exponencial) los hace el SDK de Stripe y, como
+# van con la misma Idempotency-Key, nunca crean dos sesiones.
+class PaymentUnavailable(Exception):
+    pass
+
+class StripeGateway:
+    def __init__(self, api_key, api_base=None, workers=4, timeout=10, max_retries=2):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stripe")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._stripe = None
+        self._lock = threading.Lock()
+
+    @property
+    def stripe(self):
+        # Importar y configurar el SDK solo cuando se usa por primera vez
+        if self._stripe is None:
+            with self._lock:
+                if self._stripe is None:
+                    import stripe
+                    stripe.api_key = self.api_key
+                    if self.api_base:
+                        stripe.api_base = self.api_base
+                    stripe.max_network_retries = self.max_retries
+                    # RequestsClient reutiliza conexiones HTTP (keep-alive) entre llamadas
+                    stripe.default_http_client = stripe.RequestsClient(timeout=self.timeout)
+                    self._stripe = stripe
+        return self._stripe
+
+    def _call(self, fn, **params):
+        if not self._slots.acquire(blocking=False):
+            raise PaymentUnavailable("Demasiados pagos en curso")
+        try:
+            future = self._executor.submit(fn, **params)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        # Peor caso: cada intento agota su timeout y el SDK espera entre intentos
+        limite = self.timeout * (self.max_retries + 1) + 2 * self.max_retries
+        try:
+            return future.result(timeout=limite)
+        except FutureTimeout:
+            raise PaymentUnavailable("Stripe no respondió a tiempo")
+
+    def create_checkout_session(self, idempotency_key, **params):
+        return self._call(self.stripe.checkout.Session.create, idempotency_key=idempotency_key, **params)
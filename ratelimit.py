@@ -0,0 +1,139 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# ----------------------
+# Límite de tasa (token bucket)
+# ----------------------
+# Cada llave (IP, usuario...) tiene una cubeta de `capacity` fichas que se
+# rellena a `rate` fichas por segundo. Cada intento gasta una; sin fichas, se
+# rechaza y se indica cuántos segundos faltan para la siguiente. El estado vive
+# en memoria del worker.
+class RateLimiter:
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> (fichas, última actualización)
+
+    def hit(self, key, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                self.allowed += 1
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                self.rejected += 1
+                allowed, retry_after = False, (cost - tokens) / self.rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Una cubeta llena equivale a no tener registro: se puede borrar
+        llenas = [k for k, (t, last) in self._buckets.items()
+                  if t + (now - last) * self.rate >= self.capacity]
+        for k in llenas:
+            del self._buckets[k]
+
+    def stats(self):
+        with self._lock:
+            return {"allowed": self.allowed, "rejected": self.rejected, "keys": len(self._buckets)}
+
+# ----------------------
+# Límite de concurrencia
+# ----------------------
+# Cuántas peticiones de una ruta pueden estar en curso a la vez en el worker.
+# No se hace fila: si no hay lugar se rechaza de inmediato, así una ruta cara
+# no acapara los hilos que necesitan las páginas baratas.
+class ConcurrencyLimiter:
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def cancel(self):
+        # Devuelve un lugar que al final no se usó (la petición se rechazó después)
+        with self._lock:
+            self.in_flight -= 1
+            self.admitted -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": self.in_flight, "limit": self.limit,
+                    "admitted": self.admitted, "rejected": self.rejected}
+
+# ----------------------
+# Control de admisión por ruta
+# ----------------------
+# Por ruta: una cubeta por usuario/IP (429 si se agota) y un tope de
+# peticiones simultáneas (503 si está lleno). `limits` es
+# {ruta: {"concurrency": n, "rate": fichas/s, "burst": n}}; un valor en None
+# desactiva ese límite. Como RateLimiter, el estado es por worker.
+class Rejected(Exception):
+    def __init__(self, status, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = max(1, int(retry_after + 0.999))
+        self.message = message
+
+class AdmissionControl:
+    def __init__(self, limits, busy_retry_after=2):
+        self.busy_retry_after = busy_retry_after
+        self._routes = {}
+        for nombre, cfg in limits.items():
+            concurrencia = ConcurrencyLimiter(cfg["concurrency"]) if cfg.get("concurrency") else None
+            tasa = RateLimiter(cfg["rate"], cfg.get("burst") or 1) if cfg.get("rate") else None
+            self._routes[nombre] = (concurrencia, tasa)
+
+    @contextmanager
+    def admit(self, nombre, key):
+        # Lanza Rejected antes de entrar; el lugar se suelta al salir del bloque.
+        # Primero la concurrencia: un 503 por servidor ocupado no gasta fichas
+        # del usuario, así reintentar después no le cuesta un 429
+        concurrencia, tasa = self._routes.get(nombre, (None, None))
+        if concurrencia and not concurrencia.acquire():
+            raise Rejected(503, self.busy_retry_after, "El servidor está ocupado, intenta de nuevo en unos segundos")
+        if tasa:
+            ok, espera = tasa.hit(key)
+            if not ok:
+                if concurrencia:
+                    concurrencia.cancel()
+                raise Rejected(429, espera, "Demasiadas peticiones, espera un momento")
+        try:
+            yield
+        finally:
+            if concurrencia:
+                concurrencia.release()
+
+    def stats(self):
+        # {(ruta, estadística): valor} para Metrics.collector con dos etiquetas
+        data = {}
+        for nombre, (concurrencia, tasa) in self._routes.items():
+            if concurrencia:
+                data.update({(nombre, k): v for k, v in concurrencia.stats().items()})
+            if tasa:
+                data.update({(nombre, f"rate_{k}"): v for k, v in tasa.stats().items()})
+        return data
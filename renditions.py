@@ -0,0 +1,125 @@
+import logging
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# ----------------------
+# Versiones reducidas de imágenes
+# ----------------------
+# Las subidas son PNG de varios MB que se muestran a 200px de alto. Tras guardar
+# el original, un pool de hilos genera una miniatura y una versión mediana
+# (WebP si Pillow lo soporta, si no JPEG) y avisa con un callback para
+# guardar las rutas en la base de datos. La petición nunca redimensiona.
+#
+# De los videos se saca un cuadro (poster) como miniatura con ffmpeg, si está
+# en el PATH; sin ffmpeg los videos se quedan sin poster.
+RENDITIONS = {"thumb": 400, "medio": 1024}
+SUBDIR = "renditions"
+VIDEO_EXTENSIONS = ("mp4", "mov", "webm")
+POSTER_SECOND = 1
+POSTER_TIMEOUT = 60
+
+def _output_format():
+    from PIL import features
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+def _destino(static_root, ruta, nombre, ext):
+    carpeta, archivo = os.path.split(ruta)
+    base = os.path.splitext(archivo)[0]
+    os.makedirs(os.path.join(static_root, carpeta, SUBDIR), exist_ok=True)
+    relativa = f"{carpeta}/{SUBDIR}/{base}.{nombre}.{ext}" if carpeta else f"{SUBDIR}/{base}.{nombre}.{ext}"
+    return relativa, os.path.join(static_root, relativa)
+
+def poster(static_root, ruta):
+    # {"thumb": ruta del poster} o {} si no hay ffmpeg o el video no se pudo leer
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        log.warning("ffmpeg no está instalado; %s queda sin poster", ruta)
+        return {}
+    origen = os.path.join(static_root, ruta)
+    relativa, destino = _destino(static_root, ruta, "poster", "jpg")
+    if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origen):
+        return {"thumb": relativa}
+    tmp = destino + ".tmp.jpg"
+    ancho = RENDITIONS["thumb"]
+    for segundo in (POSTER_SECOND, 0):
+        # Videos de menos de POSTER_SECOND segundos: primer cuadro
+        subprocess.run([ffmpeg, "-nostdin", "-loglevel", "error", "-y", "-ss", str(segundo), "-i", origen,
+                        "-frames:v", "1", "-vf", f"scale='min({ancho},iw)':-2", "-q:v", "4", tmp],
+                       capture_output=True, timeout=POSTER_TIMEOUT)
+        if os.path.exists(tmp) and os.path.getsize(tmp):
+            os.replace(tmp, destino)
+            return {"thumb": relativa}
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    return {}
+
+def generate(static_root, ruta):
+    # Regresa {nombre: ruta relativa a static/} solo para las versiones que
+    # realmente son más chicas que el original
+    if ruta.rsplit(".", 1)[-1].lower() in VIDEO_EXTENSIONS:
+        return poster(static_root, ruta)
+    from PIL import Image
+
+    origen = os.path.join(static_root, ruta)
+    formato, ext = _output_format()
+    if formato == "WEBP":
+        opciones = {"quality": 80, "method": 4}
+    else:
+        opciones = {"quality": 80, "optimize": True, "progressive": True}
+
+    resultado = {}
+    with Image.open(origen) as img:
+        img.seek(0)  # GIF animado: primer cuadro
+        transparente = img.mode in ("RGBA", "LA") or "transparency" in img.info
+        img = img.convert("RGBA" if formato == "WEBP" and transparente else "RGB")
+        for nombre, ancho in sorted(RENDITIONS.items(), key=lambda kv: kv[1]):
+            if img.width <= ancho:
+                break
+            relativa, destino = _destino(static_root, ruta, nombre, ext)
+            if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origen):
+                # Ya generada (p. ej. la misma imagen subida otra vez al almacén por contenido)
+                resultado[nombre] = relativa
+                continue
+            copia = img.copy()
+            copia.thumbnail((ancho, ancho * 4), Image.LANCZOS, reducing_gap=3.0)
+            tmp = destino + ".tmp"
+            copia.save(tmp, formato, **opciones)
+            os.replace(tmp, destino)
+            resultado[nombre] = relativa
+    return resultado
+
+class RenditionPipeline:
+    def __init__(self, static_root, workers=2):
+        self.static_root = static_root
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="renditions")
+
+    def submit(self, ruta, on_done):
+        return self._executor.submit(self._run, ruta, on_done)
+
+    def _run(self, ruta, on_done):
+        try:
+            resultado = generate(self.static_root, ruta)
+        except ImportError:
+            log.warning("Pillow no está instalado; no se generan versiones de %s", ruta)
+            return None
+        except Exception:
+            log.exception("No se pudieron generar versiones de %s", ruta)
+            return None
+        if resultado:
+            on_done(resultado)
+        return resultado
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+def srcset(url, thumb=None, medio=None):
+    partes = []
+    if thumb:
+        partes.append(f"{url(thumb)} {RENDITIONS['thumb']}w")
+    if medio:
+        partes.append(f"{url(medio)} {RENDITIONS['medio']}w")
+    return ", ".join(partes)
@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+# ----------------------
+# Reservas de inventario
+# ----------------------
+# El stock se aparta al crear la sesión de pago: una sola sentencia UPDATE
+# condicional para todo el carrito (si una línea no alcanza, no se aparta nada)
+# y un INSERT multi-fila con las reservas. Al pagar se confirman con un solo
+# UPDATE; las que vencen las devuelve el barrendero.
+
+def _cases(lineas):
+    sql = " ".join(["WHEN %s THEN %s"] * len(lineas))
+    params = [v for pid, cant in lineas for v in (pid, cant)]
+    return sql, params
+
+def _descontar(cursor, lineas):
+    # Devuelve True solo si TODAS las líneas tenían stock suficiente
+    cases, params = _cases(lineas)
+    ids = [pid for pid, _ in lineas]
+    cursor.execute(
+        f"UPDATE productos SET stock = stock - CASE id {cases} END "
+        f"WHERE id IN ({','.join(['%s'] * len(ids))}) AND stock >= CASE id {cases} END",
+        params + ids + params)
+    return cursor.rowcount == len(lineas)
+
+def _lineas(carrito):
+    # Orden fijo por id para que dos compras concurrentes tomen los locks igual
+    return sorted((int(pid), int(cant)) for pid, cant in carrito.items() if int(cant) > 0)
+
+def token_para(usuario, carrito, nonce=""):
+    # Mismo usuario + mismo carrito + mismo intento = mismo token. Así un doble
+    # clic reutiliza la reserva (y la Idempotency-Key de Stripe) en vez de duplicarla.
+    huella = "|".join(f"{pid}:{cant}" for pid, cant in _lineas(carrito))
+    return hashlib.sha256(f"{usuario}|{huella}|{nonce}".encode("utf-8")).hexdigest()[:32]
+
+def reservar(conn, token, usuario, carrito, ttl):
+    lineas = _lineas(carrito)
+    if not lineas:
+        return False
+    cursor = conn.cursor()
+    try:
+        if not _descontar(cursor, lineas):
+            conn.rollback()
+            return False
+        cursor.executemany(
+            "INSERT INTO reservas (token, producto_id, cantidad, usuario, expira) "
+            "VALUES (%s, %s, %s, %s, NOW() + INTERVAL %s SECOND)",
+            [(token, pid, cant, usuario, ttl) for pid, cant in lineas])
+        conn.commit()
+        return True
+    except conn.IntegrityError:
+        # (token, producto_id) es único: otra petición con el mismo token ya reservó.
+        # Solo cuenta si esa reserva sigue activa; si ya se liberó o confirmó, el
+        # stock se acaba de revertir y no hay nada apartado.
+        conn.rollback()
+        cursor.execute("SELECT COUNT(*) FROM reservas WHERE token = %s AND estado = 'activa'", (token,))
+        activas = cursor.fetchone()[0]
+        conn.commit()
+        return activas > 0
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def confirmar(conn, token, carrito=None):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE reservas SET estado = 'confirmada' WHERE token = %s AND estado = 'activa'", (token,))
+        confirmadas = cursor.rowcount
+        if not confirmadas and carrito:
+            # La reserva ya había vencido y se liberó: se intenta apartar de nuevo
+            if not _descontar(cursor, _lineas(carrito)):
+                conn.rollback()
+                return False
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def _liberar(conn, where, params):
+    cursor = conn.cursor()
+    try:
+        # FOR UPDATE: si en paralelo llega la confirmación, espera a que terminemos
+        # y ya no encuentra las filas en estado 'activa'
+        cursor.execute(f"SELECT id, producto_id, cantidad FROM reservas WHERE estado = 'activa' AND {where} FOR UPDATE", params)
+        filas = cursor.fetchall()
+        if not filas:
+            conn.commit()
+            return 0
+        totales = {}
+        for _, pid, cant in filas:
+            totales[pid] = totales.get(pid, 0) + cant
+        cases, case_params = _cases(sorted(totales.items()))
+        ids = sorted(totales)
+        cursor.execute(
+            f"UPDATE productos SET stock = stock + CASE id {cases} END WHERE id IN ({','.join(['%s'] * len(ids))})",
+            case_params + ids)
+        reservas_ids = [f[0] for f in filas]
+        cursor.execute(
+            f"UPDATE reservas SET estado = 'liberada' WHERE id IN ({','.join(['%s'] * len(reservas_ids))})",
+            reservas_ids)
+        conn.commit()
+        return len(filas)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def liberar(conn, token):
+    return _liberar(conn, "token = %s", (token,))
+
+def liberar_vencidas(conn):
+    return _liberar(conn, "expira < NOW()", ())
+
+# --- Barrendero ---
+class Barrendero:
+    # Hilo de fondo (uno por worker) que devuelve al stock las reservas vencidas.
+    # `tarea` abre su propio contexto de app y regresa cuántas reservas liberó.
+    def __init__(self, tarea, intervalo=60):
+        self.tarea = tarea
+        self.intervalo = intervalo
+        self._hilo = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._hilo and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._run, name="barrendero-reservas", daemon=True)
+            self._hilo.start()
+
+    def stop(self):
+        self._parar.set()
+
+    def _run(self):
+        while not self._parar.is_set():
+            try:
+                liberadas = self.tarea()
+                if liberadas:
+                    log.info("Reservas vencidas liberadas: %s", liberadas)
+            except Exception:
+                log.exception("Error liberando reservas vencidas")
+            self._parar.wait(self.intervalo)
@@ -0,0 +1,131 @@
+import json
+import os
+import time
+import uuid
+from werkzeug.utils import secure_filename
+
+# ----------------------
+# Subidas por partes (reanudables)
+# ----------------------
+# El navegador manda el archivo en trozos (PATCH con Upload-Offset). Cada trozo
+# se escribe directo al archivo final (con sufijo .part) sin pasar por el
+# parser multipart de Werkzeug. Si se corta la conexión, HEAD devuelve hasta
+# dónde llegó y se continúa desde ahí. El estado vive en disco para que
+# cualquier worker pueda atender el siguiente trozo.
+BUFFER = 1024 * 1024
+LOCK_TIMEOUT = 300  # un candado más viejo que esto es de un worker que murió
+
+class UploadError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class ResumableUploads:
+    def __init__(self, state_dir, dest_dir, max_bytes, extensions):
+        self.state_dir = state_dir
+        self.dest_dir = dest_dir
+        self.max_bytes = max_bytes
+        self.extensions = extensions
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _state_path(self, upload_id):
+        if not upload_id.isalnum():
+            raise UploadError(404, "Subida no encontrada")
+        return os.path.join(self.state_dir, f"{upload_id}.json")
+
+    def _part_path(self, state):
+        return os.path.join(self.dest_dir, state["filename"] + ".part")
+
+    def create(self, nombre, tamano, usuario):
+        filename = secure_filename(nombre or "")
+        if "." not in filename or filename.rsplit(".", 1)[1].lower() not in self.extensions:
+            raise UploadError(400, "Tipo de archivo no permitido")
+        if tamano <= 0:
+            raise UploadError(400, "Tamaño inválido")
+        if tamano > self.max_bytes:
+            raise UploadError(413, f"El archivo excede el máximo de {self.max_bytes // (1024 * 1024)} MB")
+
+        upload_id = uuid.uuid4().hex
+        state = {
+            "id": upload_id,
+            "nombre": filename,
+            # Prefijo único: dos usuarios subiendo "video.mp4" ya no se pisan
+            "filename": f"{upload_id[:8]}_{filename}",
+            "tamano": tamano,
+            "usuario": usuario,
+            "creado": time.time(),
+        }
+        open(self._part_path(state), "wb").close()
+        with open(self._state_path(upload_id), "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        return state
+
+    def get(self, upload_id):
+        try:
+            with open(self._state_path(upload_id), encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            raise UploadError(404, "Subida no encontrada")
+        try:
+            state["offset"] = os.path.getsize(self._part_path(state))
+        except FileNotFoundError:
+            raise UploadError(404, "Subida no encontrada")
+        return state
+
+    def append(self, upload_id, offset, stream, length):
+        lock = self._state_path(upload_id) + ".lock"
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.time() - os.path.getmtime(lock) < LOCK_TIMEOUT:
+                raise UploadError(409, "Ya se está subiendo otro trozo de este archivo")
+            os.remove(lock)
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        try:
+            state = self.get(upload_id)
+            if offset != state["offset"]:
+                raise UploadError(409, "Offset incorrecto")
+            restante = state["tamano"] - offset
+            if length is None or length > restante:
+                raise UploadError(413, "El trozo excede el tamaño declarado")
+            with open(self._part_path(state), "ab") as f:
+                while length > 0:
+                    data = stream.read(min(BUFFER, length))
+                    if not data:
+                        break
+                    f.write(data)
+                    length -= len(data)
+            state["offset"] = os.path.getsize(self._part_path(state))
+            state["completo"] = state["offset"] == state["tamano"]
+            if state["completo"]:
+                # Mismo directorio: rename atómico, sin copiar
+                os.replace(self._part_path(state), os.path.join(self.dest_dir, state["filename"]))
+                os.remove(self._state_path(upload_id))
+            return state
+        finally:
+            os.remove(lock)
+
+    def cancel(self, upload_id):
+        state = self.get(upload_id)
+        os.remove(self._part_path(state))
+        os.remove(self._state_path(upload_id))
+
+    def cleanup(self, max_age):
+        # Borra subidas abandonadas (sin actividad en `max_age` segundos)
+        borradas = 0
+        limite = time.time() - max_age
+        for nombre in os.listdir(self.state_dir):
+            if not nombre.endswith(".json"):
+                continue
+            upload_id = nombre[:-5]
+            try:
+                state = self.get(upload_id)
+                part = self._part_path(state)
+                if max(os.path.getmtime(part), state["creado"]) < limite:
+                    self.cancel(upload_id)
+                    borradas += 1
+            except (UploadError, OSError):
+                continue
+        return borradas
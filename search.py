@@ -0,0 +1,231 @@
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+
+# ----------------------
+# Búsqueda (índice invertido en memoria)
+# ----------------------
+# Cada worker arma el índice desde la base la primera vez que se busca y luego
+# lo mantiene al día de forma incremental. Las escrituras se aplican en el
+# índice local y se anotan en un diario (archivo JSONL en instance/) que los
+# demás workers leen desde donde se quedaron antes de cada búsqueda: solo se
+# procesa lo nuevo, nunca se vuelve a leer la tabla completa. Si el diario se
+# rota (cambia de inodo) el worker reconstruye desde la base.
+STOPWORDS = frozenset("""
+a al algo como con de del el en es esta este esto la las le lo los mas me mi muy
+no o para pero por que se si sin su sus te tu un una uno y ya
+""".split())
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_EXPANSIONES = 64  # términos por prefijo a considerar en el typeahead
+
+_PALABRA = re.compile(r"[a-z0-9]+")
+
+def normalizar(texto):
+    # Minúsculas y sin acentos: "Canción" == "cancion", "Ñandú" == "nandu"
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+def _raiz(palabra):
+    # Plural simple del español: "juegos" -> "juego", "mapas" -> "mapa"
+    if len(palabra) > 4 and palabra.endswith("es") and palabra[-3] not in "aeiou":
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith("s"):
+        return palabra[:-1]
+    return palabra
+
+def tokenize(texto):
+    return [_raiz(p) for p in _PALABRA.findall(normalizar(texto)) if p not in STOPWORDS]
+
+class SearchIndex:
+    # `loader()` regresa (tipo, id, campos) para todos los documentos.
+    # `weights` da el peso de cada campo por tipo, p. ej. {"producto": {"nombre": 3}}.
+    def __init__(self, loader, journal_path, weights=None, max_journal_bytes=5 * 1024 * 1024):
+        self.loader = loader
+        self.journal_path = journal_path
+        self.weights = weights or {}
+        self.max_journal_bytes = max_journal_bytes
+        self.rebuilds = 0
+        self._lock = threading.RLock()
+        self._built = False
+        self._journal = None  # (inodo, offset) leídos hasta ahora
+        self._postings = {}   # término -> {(tipo, id): frecuencia ponderada}
+        self._terms = []      # términos ordenados, para buscar por prefijo
+        self._docs = {}       # (tipo, id) -> (campos, {término: frecuencia}, longitud)
+        self._total_len = 0
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+
+    # --- Estructura ---
+    def _add(self, key, campos):
+        pesos = self.weights.get(key[0], {})
+        frecuencias = {}
+        for campo, valor in campos.items():
+            peso = pesos.get(campo, 1)
+            if not peso:
+                continue
+            for termino in tokenize(valor):
+                frecuencias[termino] = frecuencias.get(termino, 0) + peso
+        longitud = sum(frecuencias.values())
+        for termino, tf in frecuencias.items():
+            posting = self._postings.get(termino)
+            if posting is None:
+                posting = self._postings[termino] = {}
+                bisect.insort(self._terms, termino)
+            posting[key] = tf
+        self._docs[key] = (campos, frecuencias, longitud)
+        self._total_len += longitud
+
+    def _remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for termino in doc[1]:
+            posting = self._postings.get(termino)
+            if posting is None:
+                continue
+            posting.pop(key, None)
+            if not posting:
+                del self._postings[termino]
+                i = bisect.bisect_left(self._terms, termino)
+                if i < len(self._terms) and self._terms[i] == termino:
+                    del self._terms[i]
+        self._total_len -= doc[2]
+
+    def _apply(self, entry):
+        key = (entry["tipo"], entry["id"])
+        self._remove(key)
+        if entry["op"] == "put":
+            self._add(key, entry["campos"])
+
+    # --- Diario compartido ---
+    def _journal_state(self):
+        try:
+            st = os.stat(self.journal_path)
+            return st.st_ino, st.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    def _build(self):
+        # La posición del diario se toma ANTES de leer la base: lo que se
+        # escriba mientras cargamos se vuelve a aplicar después (es idempotente)
+        inodo, offset = self._journal_state()
+        self._postings, self._terms, self._docs, self._total_len = {}, [], {}, 0
+        for tipo, id, campos in self.loader():
+            self._add((tipo, id), campos)
+        self._journal = (inodo, offset)
+        self._built = True
+        self.rebuilds += 1
+
+    def _catch_up(self):
+        inodo, size = self._journal_state()
+        if not self._built or (inodo != self._journal[0] and self._journal[0] is not None):
+            self._build()
+            inodo, size = self._journal_state()
+        # Un diario que no existía al construir se lee desde el principio
+        offset = self._journal[1] if inodo == self._journal[0] else 0
+        if inodo is None or size <= offset:
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        # Solo líneas completas: una escritura a medias se lee en la siguiente vuelta
+        fin = data.rfind(b"\n") + 1
+        for linea in data[:fin].splitlines():
+            if linea.strip():
+                self._apply(json.loads(linea))
+        self._journal = (inodo, offset + fin)
+
+    def _write(self, entry):
+        linea = (json.dumps(entry, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            if self._built:
+                self._apply(entry)
+            # O_APPEND: las líneas de varios workers no se mezclan
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, linea)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size > self.max_journal_bytes:
+                self.invalidate()
+
+    def invalidate(self):
+        # Diario nuevo: todos (incluido este worker) reconstruyen desde la base
+        tmp = f"{self.journal_path}.{os.getpid()}.tmp"
+        open(tmp, "wb").close()
+        os.replace(tmp, self.journal_path)
+
+    # --- API ---
+    def put(self, tipo, id, **campos):
+        self._write({"op": "put", "tipo": tipo, "id": id, "campos": campos})
+
+    def delete(self, tipo, id):
+        self._write({"op": "delete", "tipo": tipo, "id": id})
+
+    def search(self, query, tipos=None, limit=10, prefix=True):
+        # Todos los términos deben aparecer (AND); con `prefix` el último se
+        # toma como inicio de palabra para el typeahead. Orden por BM25.
+        palabras = _PALABRA.findall(normalizar(query))
+        if not palabras:
+            return []
+        ultima = palabras[-1] if prefix else None
+        terminos = [_raiz(p) for p in palabras[:-1] if p not in STOPWORDS] if prefix else tokenize(query)
+
+        with self._lock:
+            self._catch_up()
+            n = len(self._docs)
+            if not n:
+                return []
+            promedio = self._total_len / n or 1
+            grupos = [[(t, 1.0)] for t in terminos]
+            if ultima:
+                # Término exacto (con plural recortado) + hasta MAX_EXPANSIONES que empiecen igual
+                i = bisect.bisect_left(self._terms, ultima)
+                expansiones = []
+                for t in self._terms[i:i + MAX_EXPANSIONES]:
+                    if not t.startswith(ultima):
+                        break
+                    expansiones.append((t, 1.0 if t == ultima else 0.8))
+                exacto = _raiz(ultima)
+                if exacto != ultima and exacto in self._postings:
+                    expansiones.append((exacto, 1.0))
+                grupos.append(expansiones)
+
+            # El grupo más selectivo primero; los demás solo revisan a sus candidatos
+            grupos.sort(key=lambda g: sum(len(self._postings.get(t, ())) for t, _ in g))
+            puntajes = None
+            for grupo in grupos:
+                parcial = {}
+                for termino, factor in grupo:
+                    posting = self._postings.get(termino)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                    if puntajes is None:
+                        candidatos = posting.items()
+                    else:
+                        candidatos = ((k, posting[k]) for k in puntajes if k in posting)
+                    for key, tf in candidatos:
+                        if tipos and key[0] not in tipos:
+                            continue
+                        largo = self._docs[key][2]
+                        s = factor * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * largo / promedio))
+                        if s > parcial.get(key, 0):
+                            parcial[key] = s
+                puntajes = parcial if puntajes is None else {k: puntajes[k] + v for k, v in parcial.items()}
+                if not puntajes:
+                    return []
+
+            mejores = heapq.nlargest(limit, puntajes.items(), key=lambda kv: kv[1])
+            return [{"tipo": k[0], "id": k[1], "score": round(s, 4), **self._docs[k][0]} for k, s in mejores]
+
+    def stats(self):
+        with self._lock:
+            return {"docs": len(self._docs), "terms": len(self._terms), "rebuilds": self.rebuilds,
+                    "journal_offset": self._journal[1] if self._journal else 0}
@@ -1,451 +1,276 @@
-from flask import Flask, render_template, redirect, url_for, flash, session, request
 import os
-from config import AppConfig
-from werkzeug.security import generate_password_hash, check_password_hash
-from forms import LoginForm, RegisterForm
-from flask_mysqldb import MySQL
-from MySQLdb.cursors import DictCursor
-from functools import wraps
-from werkzeug.utils import secure_filename
-import stripe
-
-app = Flask(__name__)
-app.config.from_object(AppConfig)
-
-# --- Configuración de Stripe ---
-# La clave se lee desde config.py para seguridad
-stripe.api_key = app.config.get('STRIPE_SECRET_KEY')
-
-# --- Configuración de Subidas ---
-UPLOAD_FOLDER_PRODUCTOS = os.path.join(app.root_path, 'static/uploads/productos')
-UPLOAD_FOLDER_GENERAL = os.path.join(app.root_path, 'static/uploads')
-os.makedirs(UPLOAD_FOLDER_PRODUCTOS, exist_ok=True)
-os.makedirs(UPLOAD_FOLDER_GENERAL, exist_ok=True)
-
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-# --- Base de Datos ---
-mysql = MySQL(app)
-
-# --- Decoradores y Ayudas ---
-def user_authenticated():
-    return session.get("logged_in", False)
-
-def login_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if not session.get("logged_in"):
-            flash("Debes iniciar sesión para acceder a esta página", "error")
-            return redirect(url_for("login"))
-        return f(*args, **kwargs)
-    return decorated_function
-
-def role_required(role):
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if session.get("rol") != role:
-                flash("No tienes permiso para acceder a esta página", "error")
-                return redirect(url_for("index"))
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
-
-# ==================================================================
-# RUTAS GENERALES (Auth, Home, Wiki)
-# ==================================================================
-
-@app.route('/')
-def index():
-    return render_template('index.html', user_authenticated=user_authenticated(), fondo="Fondo.gif")
-
-@app.route("/login", methods=["GET", "POST"])
-def login():
-    form = LoginForm()
-    if form.validate_on_submit():
-        usuario = form.usuario.data.strip()
-        password = form.password.data
-        cursor = mysql.connection.cursor(DictCursor)
+import click
+from flask import Flask, url_for
+
+# ----------------------
+# Fábrica de la aplicación
+# ----------------------
+# create_app() arma la app: configuración, servicios compartidos (ver
+# extensions.py) y los blueprints de cada área (ver blueprints/). Importar este
+# módulo no importa MySQLdb, Stripe, Pillow ni WTForms y no toca el disco: cada
+# dependencia pesada se carga la primera vez que se usa, así un worker nuevo
+# de Gunicorn está listo antes.
+#
+#   gunicorn 'server:create_app()'      (server:app también funciona)
+#   flask --app server run
+#
+# La configuración sale de config.AppConfig si existe; si no, de las
+# variables de entorno en ENV_KEYS (por ejemplo, las de .env).
+ENV_KEYS = ("SECRET_KEY", "MYSQL_HOST", "MYSQL_PORT", "MYSQL_USER", "MYSQL_PASSWORD", "MYSQL_DB",
+            "STRIPE_SECRET_KEY", "STRIPE_API_BASE", "METRICS_TOKEN", "SESSION_BACKEND")
+
+def _configurar(app, config):
+    if config is None:
         try:
-            cursor.execute("SELECT * FROM regis WHERE username = %s", (usuario,))
-            user = cursor.fetchone()
-        finally:
-            cursor.close()
-        
-        if user and check_password_hash(user["password"], password):
-            session["logged_in"] = True
-            session["usuario"] = usuario
-            session["rol"] = user.get("rol", "usuario")
-            session.pop("carrito", None) # Limpiar carrito anterior
-            flash("Has iniciado sesión correctamente", "success")
-            return redirect(url_for("index"))
-        else:
-            flash("Usuario o contraseña incorrectos", "error")
-    return render_template("login.html", form=form, user_authenticated=user_authenticated())
-
-@app.route("/register", methods=["GET", "POST"])
-def register():
-    form = RegisterForm()
-    if form.validate_on_submit():
-        try:
-            cursor = mysql.connection.cursor()
-            cursor.execute("INSERT INTO regis (nombre, apellidos, username, email, password, rol) VALUES (%s, %s, %s, %s, %s, %s)",
-                (form.usrname.data.strip(), form.usrln.data.strip(), form.usrn.data.strip(), form.usrmail.data.strip(), generate_password_hash(form.usrpass.data), "usuario"))
-            mysql.connection.commit()
-            cursor.close()
-            flash("Registro exitoso", "success")
-            return redirect(url_for("login"))
-        except Exception:
-            flash("El usuario o correo ya existe", "error")
-    return render_template("forms/register.html", form=form, user_authenticated=user_authenticated())
-
-@app.route('/logout')
-@login_required
-def logout():
-    session.clear()
-    flash("Has cerrado sesión", "success")
-    return redirect(url_for('index'))
-
-# --- WIKI / JUEGOS ---
-@app.route('/juegos')
-def juegos():
-    return render_template('juegos.html', user_authenticated=user_authenticated())
-
-@app.route("/juego/<nombre>")
-def juego(nombre):
-    fondos = {
-        "half-life": "FondoHL.jpg", "cs": "FondoCS.jpg", "portal": "FondoPortal.jpg",
-        "tf2": "FondoTF2.jpg", "l4d": "FondoL4D.jpg", "l4d2": "FondoL4D2.jpg",
-        "dota2": "FondoDota2.jpg", "alyx": "FondoAlyx.jpg"
-    }
-    fondo = fondos.get(nombre, "Fondo.gif")
-    
-    juegos_protegidos = ['l4d', 'l4d2', 'dota2', 'alyx']
-    if nombre in juegos_protegidos and not user_authenticated():
-        flash("Debes iniciar sesión para ver este contenido", "error")
-        return redirect(url_for('login'))
-
-    juego_data = {"nombre": nombre, "titulo": nombre.replace('-', ' ').capitalize(), "descripcion": "Descripción..."}
-    return render_template("juego.html", juego=juego_data, fondo=fondo, user_authenticated=user_authenticated())
-
-# ==================================================================
-# RUTAS DE TIENDA Y ADMIN DE PRODUCTOS
-# ==================================================================
-
-@app.route('/tienda')
-def tienda():
-    cursor = mysql.connection.cursor(DictCursor)
+            from config import AppConfig as config
+        except ModuleNotFoundError as e:
+            if e.name != "config":
+                raise
+    if config is None:
+        app.config.from_mapping({k: os.environ[k] for k in ENV_KEYS if k in os.environ})
+    elif isinstance(config, dict):
+        app.config.from_mapping(config)
+    else:
+        app.config.from_object(config)
+
+    # Tope para cualquier cuerpo de petición (formularios y cada trozo de video)
+    if app.config.get('MAX_CONTENT_LENGTH') is None:
+        app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+
+# --- Consultas de los servicios ---
+# Corren en hilos de fondo (feed) o al construir el índice: reciben el
+# PooledMySQL real, no el proxy de extensions.py
+def cargar_indice(mysql):
+    # Solo corre al construir el índice (primera búsqueda del worker o diario rotado)
+    cursor = mysql.connection.cursor()
     try:
-        cursor.execute("SELECT * FROM productos WHERE stock > 0")
-        productos = cursor.fetchall()
+        cursor.execute("SELECT id, nombre, descripcion FROM productos")
+        for id, nombre, descripcion in cursor.fetchall():
+            yield 'producto', id, {'nombre': nombre, 'descripcion': descripcion}
+        cursor.execute("SELECT id, username, comentario FROM comentarios")
+        for id, username, comentario in cursor.fetchall():
+            yield 'comentario', id, {'comentario': comentario, 'username': username}
     finally:
         cursor.close()
-    return render_template('tienda.html', productos=productos, user_authenticated=user_authenticated())
-
-@app.route('/admin/productos', methods=['GET', 'POST'])
-@login_required
-@role_required('admin')
-def admin_productos():
-    cursor = mysql.connection.cursor(DictCursor)
-    if request.method == 'POST':
-        imagen_url_relativa = None
-        if 'imagen_file' in request.files:
-            file = request.files['imagen_file']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file.save(os.path.join(UPLOAD_FOLDER_PRODUCTOS, filename))
-                imagen_url_relativa = f"uploads/productos/{filename}"
 
+def ultimo_comentario(mysql):
+    with mysql.pool.connection() as conn:
+        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO productos (nombre, descripcion, precio, stock, imagen_url) VALUES (%s, %s, %s, %s, %s)",
-                (request.form['nombre'], request.form['descripcion'], request.form['precio'], request.form['stock'], imagen_url_relativa))
-            mysql.connection.commit()
-            flash('Producto agregado', 'success')
-        except Exception as e:
-            flash(f'Error: {str(e)}', 'error')
-        return redirect(url_for('admin_productos'))
-
-    cursor.execute("SELECT * FROM productos ORDER BY id DESC")
-    productos = cursor.fetchall()
-    cursor.close()
-    return render_template('admin_productos.html', productos=productos, user_authenticated=user_authenticated())
-
-@app.route('/admin/productos/editar/<int:id>', methods=['GET', 'POST'])
-@login_required
-@role_required('admin')
-def modificar_producto(id):
-    cursor = mysql.connection.cursor(DictCursor)
-    if request.method == 'POST':
-        imagen_url = request.form['imagen_actual']
-        if 'imagen_file' in request.files:
-            file = request.files['imagen_file']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file.save(os.path.join(UPLOAD_FOLDER_PRODUCTOS, filename))
-                imagen_url = f"uploads/productos/{filename}"
+            cursor.execute("SELECT MAX(id) FROM comentarios")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
 
+def comentarios_nuevos(mysql, desde, limite):
+    from db import dict_cursor
+    with mysql.pool.connection() as conn:
+        cursor = dict_cursor(conn)
         try:
-            cursor.execute("UPDATE productos SET nombre=%s, descripcion=%s, precio=%s, stock=%s, imagen_url=%s WHERE id=%s",
-                (request.form['nombre'], request.form['descripcion'], request.form['precio'], request.form['stock'], imagen_url, id))
-            mysql.connection.commit()
-            flash('Producto actualizado', 'success')
-        except Exception as e:
-            flash(f'Error: {str(e)}', 'error')
-        return redirect(url_for('admin_productos'))
-
-    cursor.execute("SELECT * FROM productos WHERE id = %s", (id,))
-    producto = cursor.fetchone()
-    cursor.close()
-    return render_template('modificar_producto.html', producto=producto, user_authenticated=user_authenticated())
-
-@app.route('/admin/productos/eliminar/<int:id>', methods=['POST'])
-@login_required
-@role_required('admin')
-def eliminar_producto(id):
-    cursor = mysql.connection.cursor()
-    cursor.execute("DELETE FROM productos WHERE id = %s", (id,))
-    mysql.connection.commit()
-    cursor.close()
-    flash('Producto eliminado', 'success')
-    return redirect(url_for('admin_productos'))
-
-# ==================================================================
-# RUTAS DE CARRITO Y PAGO
-# ==================================================================
-
-@app.route('/carrito/agregar/<int:id>', methods=['POST'])
-@login_required
-def agregar_al_carrito(id):
-    if 'carrito' not in session: session['carrito'] = {}
-    carrito = session['carrito']
-    pid = str(id)
-    cant = int(request.form.get('cantidad', 1))
-    
-    # Validar stock
-    cursor = mysql.connection.cursor(DictCursor)
-    cursor.execute("SELECT stock FROM productos WHERE id = %s", (pid,))
-    prod = cursor.fetchone()
-    cursor.close()
-    
-    if prod and (carrito.get(pid, 0) + cant) <= prod['stock']:
-        carrito[pid] = carrito.get(pid, 0) + cant
-        session.modified = True
-        flash('Agregado al carrito', 'success')
-    else:
-        flash('No hay suficiente stock', 'error')
-    return redirect(url_for('tienda'))
-
-@app.route('/carrito')
-@login_required
-def ver_carrito():
-    carrito = session.get('carrito', {})
-    ids = list(carrito.keys())
-    items = []
-    total = 0
-    
-    if ids:
-        cursor = mysql.connection.cursor(DictCursor)
-        format_strings = ','.join(['%s'] * len(ids))
-        cursor.execute(f"SELECT * FROM productos WHERE id IN ({format_strings})", tuple(ids))
-        productos = cursor.fetchall()
-        cursor.close()
-        
-        for p in productos:
-            pid = str(p['id'])
-            c = carrito.get(pid, 0)
-            if c > 0:
-                sub = p['precio'] * c
-                items.append({**p, 'cantidad': c, 'subtotal': sub})
-                total += sub
-    
-    return render_template('carrito.html', items_en_carrito=items, total=total, user_authenticated=user_authenticated())
-
-@app.route('/carrito/eliminar/<int:id>', methods=['POST'])
-@login_required
-def eliminar_del_carrito(id):
-    pid = str(id)
-    if 'carrito' in session and pid in session['carrito']:
-        session['carrito'].pop(pid)
-        session.modified = True
-        flash('Eliminado del carrito', 'success')
-    return redirect(url_for('ver_carrito'))
-
-@app.route('/crear-sesion-checkout', methods=['POST'])
-@login_required
-def crear_sesion_checkout():
-    carrito = session.get('carrito', {})
-    if not carrito: return redirect(url_for('ver_carrito'))
-    
-    ids = list(carrito.keys())
-    cursor = mysql.connection.cursor(DictCursor)
-    format_strings = ','.join(['%s'] * len(ids))
-    cursor.execute(f"SELECT id, nombre, precio FROM productos WHERE id IN ({format_strings})", tuple(ids))
-    productos_db = cursor.fetchall()
-    cursor.close()
-
-    line_items = []
-    for p in productos_db:
-        c = carrito.get(str(p['id']), 0)
-        if c > 0:
-            line_items.append({
-                'price_data': {
-                    'currency': 'mxn',
-                    'product_data': {'name': p['nombre']},
-                    'unit_amount': int(p['precio'] * 100),
-                },
-                'quantity': c,
-            })
-            
-    try:
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=line_items,
-            mode='payment',
-            success_url=url_for('pedido_exitoso', _external=True),
-            cancel_url=url_for('pedido_cancelado', _external=True),
-        )
-        return redirect(checkout_session.url, code=303)
-    except Exception as e:
-        flash(f"Error Stripe: {str(e)}", "error")
-        return redirect(url_for('ver_carrito'))
-
-@app.route('/pedido-exitoso')
-@login_required
-def pedido_exitoso():
-    carrito = session.get('carrito', {})
-    if carrito:
-        cursor = mysql.connection.cursor()
-        for pid, cant in carrito.items():
-            cursor.execute("UPDATE productos SET stock = stock - %s WHERE id = %s", (cant, pid))
-        mysql.connection.commit()
-        cursor.close()
-        session.pop('carrito', None)
-    return render_template('pedido_exitoso.html', user_authenticated=user_authenticated())
-
-@app.route('/pedido-cancelado')
-@login_required
-def pedido_cancelado():
-    return render_template('pedido_cancelado.html', user_authenticated=user_authenticated())
-
-# ==================================================================
-# MULTIMEDIA Y COMENTARIOS
-# ==================================================================
-
-@app.route('/upload', methods=['GET', 'POST'])
-@login_required
-def upload():
-    cursor = mysql.connection.cursor(DictCursor)
-    if request.method == 'POST':
-        if 'archivo' not in request.files: return redirect(request.url)
-        file = request.files['archivo']
-        if file.filename == '': return redirect(request.url)
-        
-        filename = secure_filename(file.filename)
-        file.save(os.path.join(UPLOAD_FOLDER_GENERAL, filename))
-        tipo = "video" if filename.lower().endswith(('.mp4', '.mov')) else "imagen"
-        
-        cursor.execute("INSERT INTO multimedia (tipo, nombre, ruta, usuario) VALUES (%s, %s, %s, %s)",
-            (tipo, filename, f"uploads/{filename}", session.get("usuario")))
-        mysql.connection.commit()
-        flash("Archivo subido", "success")
-        return redirect(url_for('upload'))
-
-    cursor.execute("SELECT * FROM multimedia ORDER BY id DESC")
-    multimedia = cursor.fetchall()
-    cursor.close()
-    return render_template("upload.html", multimedia=multimedia, user_authenticated=user_authenticated())
-
-@app.route("/borrar_imagen/<int:id>", methods=["POST"])
-@login_required
-@role_required("admin")
-def borrar_imagen(id):
-    cursor = mysql.connection.cursor(DictCursor)
-    cursor.execute("SELECT ruta FROM multimedia WHERE id = %s", (id,))
-    img = cursor.fetchone()
-    if img:
-        path = os.path.join(app.root_path, 'static', img['ruta'])
-        if os.path.exists(path): os.remove(path)
-        cursor.execute("DELETE FROM multimedia WHERE id = %s", (id,))
-        mysql.connection.commit()
-        flash("Eliminado", "success")
-    cursor.close()
-    return redirect(url_for("upload"))
-
-@app.route("/comentarios", methods=["GET", "POST"])
-@login_required
-def comentarios():
-    cursor = mysql.connection.cursor(DictCursor)
-    if request.method == "POST":
-        cursor.execute("INSERT INTO comentarios (username, comentario) VALUES (%s, %s)",
-            (session.get("usuario"), request.form["comentario"]))
-        mysql.connection.commit()
-        flash("Comentario publicado", "success")
-        return redirect(url_for("comentarios"))
-
-    cursor.execute("SELECT * FROM comentarios ORDER BY fecha DESC")
-    comentarios_db = cursor.fetchall()
-    cursor.close()
-    return render_template("comentarios.html", comentarios=comentarios_db, user_authenticated=user_authenticated())
-
-@app.route("/borrar_comentario/<int:id>", methods=["POST"])
-@login_required
-@role_required("admin")
-def borrar_comentario(id):
-    cursor = mysql.connection.cursor()
-    cursor.execute("DELETE FROM comentarios WHERE id = %s", (id,))
-    mysql.connection.commit()
-    cursor.close()
-    flash("Comentario eliminado", "success")
-    return redirect(url_for("comentarios"))
-
-# ==================================================================
-# GESTIÓN DE USUARIOS (ADMIN)
-# ==================================================================
-
-@app.route("/usuarios")
-@login_required
-@role_required("admin")
-def usuarios():
-    cursor = mysql.connection.cursor(DictCursor)
-    cursor.execute("SELECT * FROM regis")
-    usuarios = cursor.fetchall()
-    cursor.close()
-    return render_template("usuarios.html", usuarios=usuarios, user_authenticated=user_authenticated())
-
-@app.route("/eliminar_usuario/<int:id>", methods=["POST"])
-@login_required
-@role_required("admin")
-def eliminar_usuario(id):
-    cursor = mysql.connection.cursor()
-    cursor.execute("DELETE FROM regis WHERE id = %s", (id,))
-    mysql.connection.commit()
-    flash("Usuario eliminado", "success")
-    cursor.close()
-    return redirect(url_for("usuarios"))
-
-@app.route("/modificar_usuario/<int:id>", methods=["GET", "POST"])
-@login_required
-@role_required("admin")
-def modificar_usuario(id):
-    cursor = mysql.connection.cursor(DictCursor)
-    try:
-        if request.method == "POST":
-            cursor.execute("UPDATE regis SET nombre=%s, apellidos=%s, email=%s, rol=%s WHERE id=%s",
-                (request.form["nombre"], request.form["apellidos"], request.form["email"], request.form["rol"], id))
-            mysql.connection.commit()
-            flash("Usuario modificado", "success")
-            return redirect(url_for("usuarios"))
-
-        cursor.execute("SELECT * FROM regis WHERE id = %s", (id,))
-        usuario = cursor.fetchone()
-        
-        if not usuario:
-            flash("Usuario no encontrado", "error")
-            return redirect(url_for('usuarios'))
-
-        return render_template("modificar_usuario.html", usuario=usuario, user_authenticated=user_authenticated())
-    finally:
-        cursor.close()
\ No newline at end of file
+            cursor.execute("SELECT id, username, comentario, fecha FROM comentarios WHERE id > %s ORDER BY id LIMIT %s",
+                           (desde, limite))
+            return list(cursor.fetchall())
+        finally:
+            cursor.close()
+
+# --- Control de Admisión ---
+# Por ruta cara: tope de peticiones simultáneas en el worker (503 al llenarse)
+# y cubeta por usuario/IP con `rate` fichas por segundo y ráfaga `burst` (429).
+# ADMISSION_LIMITS en la configuración cambia cualquiera de estos valores
+# ({"upload": {"concurrency": 4}}); None desactiva ese límite.
+ADMISSION_DEFAULTS = {
+    'comentarios': {'concurrency': 8, 'rate': 6 / 60, 'burst': 5},
+    'upload': {'concurrency': 2, 'rate': 30 / 3600, 'burst': 5},
+    'agregar_al_carrito': {'concurrency': 16, 'rate': 1, 'burst': 20},
+    'crear_sesion_checkout': {'concurrency': 4, 'rate': 5 / 60, 'burst': 3},
+}
+
+def _servicios(app):
+    # Un objeto de cada servicio por app; los blueprints los ven por extensions.py
+    from functools import partial
+    import reservas
+    from db import PooledMySQL
+    from cache import VersionedCache, PageCache
+    from payments import StripeGateway
+    from passwords import PasswordHasher
+    from ratelimit import RateLimiter, AdmissionControl
+    from search import SearchIndex
+    from feed import CommentFeed
+    from storage import ContentStore
+    from resumable import ResumableUploads
+    from renditions import RenditionPipeline
+    from blueprints.helpers import VIDEO_EXTENSIONS
+
+    static_root = app.static_folder
+    os.makedirs(app.instance_path, exist_ok=True)
+
+    # --- Base de Datos ---
+    # Pool acotado (MYSQL_POOL_SIZE) compartido por todas las rutas del worker;
+    # la primera conexión se abre con la primera consulta
+    mysql = PooledMySQL(app)
+
+    # --- Configuración de Stripe ---
+    # La clave se lee desde la configuración; el SDK se importa en el primer pago.
+    # STRIPE_API_BASE permite apuntar a fake_stripe.py para pruebas locales.
+    pagos = StripeGateway(
+        app.config.get('STRIPE_SECRET_KEY'),
+        api_base=app.config.get('STRIPE_API_BASE'),
+        workers=app.config.get('STRIPE_WORKERS', 4),
+        timeout=app.config.get('STRIPE_TIMEOUT', 10),
+        max_retries=app.config.get('STRIPE_MAX_RETRIES', 2))
+
+    # --- Configuración de Subidas ---
+    # Los videos se suben por partes directo a static/uploads; imágenes y videos
+    # se guardan una sola vez por contenido (ver storage.py)
+    upload_folder = os.path.join(static_root, 'uploads')
+    os.makedirs(upload_folder, exist_ok=True)
+    subidas = ResumableUploads(
+        os.path.join(app.instance_path, 'subidas'), upload_folder,
+        app.config.get('MAX_VIDEO_BYTES', 500 * 1024 * 1024), VIDEO_EXTENSIONS)
+    almacen = ContentStore(static_root)
+
+    # Miniaturas y versiones medianas se generan fuera de la petición
+    renditions = RenditionPipeline(static_root, workers=app.config.get('RENDITION_WORKERS', 2))
+
+    # --- Cachés ---
+    # La versión del catálogo vive en instance/ para que todos los workers de Gunicorn la vean
+    catalogo_cache = VersionedCache(
+        os.path.join(app.instance_path, 'catalogo.version'),
+        ttl=app.config.get('CATALOGO_CACHE_TTL', 60))
+    page_cache = PageCache(max_entries=app.config.get('PAGE_CACHE_MAX', 256))
+
+    # --- Búsqueda ---
+    # Índice invertido en memoria (ver search.py); las rutas que escriben productos
+    # o comentarios lo actualizan con buscador.put / buscador.delete
+    buscador = SearchIndex(
+        partial(cargar_indice, mysql), os.path.join(app.instance_path, 'busqueda.jsonl'),
+        weights={'producto': {'nombre': 3, 'descripcion': 1}, 'comentario': {'comentario': 1, 'username': 0.5}})
+
+    # --- Feed de Comentarios ---
+    # Un hilo por worker consulta los comentarios nuevos y los reparte a todos los
+    # clientes de /comentarios/stream (ver feed.py)
+    feed_comentarios = CommentFeed(
+        partial(ultimo_comentario, mysql), partial(comentarios_nuevos, mysql),
+        interval=app.config.get('FEED_INTERVAL', 2.0),
+        max_clients=app.config.get('FEED_MAX_CLIENTS', 100))
+
+    # --- Reservas de Inventario ---
+    def barrer_reservas():
+        with app.app_context():
+            liberadas = reservas.liberar_vencidas(mysql.connection)
+        if liberadas:
+            catalogo_cache.invalidate()
+        return liberadas
+
+    barrendero = reservas.Barrendero(barrer_reservas, intervalo=app.config.get('RESERVA_BARRIDO_INTERVALO', 60))
+
+    # --- Contraseñas ---
+    # El hash corre en un pool de procesos acotado; si cambia PASSWORD_HASH_METHOD
+    # los hashes viejos se actualizan solos en el siguiente login correcto
+    hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 4))
+
+    # Intentos de login/registro: por IP y por nombre de usuario
+    limite_auth_ip = RateLimiter(rate=app.config.get('AUTH_IP_RATE', 10 / 60), capacity=app.config.get('AUTH_IP_BURST', 10))
+    limite_auth_usuario = RateLimiter(rate=app.config.get('AUTH_USER_RATE', 5 / 60), capacity=app.config.get('AUTH_USER_BURST', 5))
+
+    limites = app.config.get('ADMISSION_LIMITS') or {}
+    admision = AdmissionControl({k: {**v, **limites.get(k, {})} for k, v in ADMISSION_DEFAULTS.items()},
+                                busy_retry_after=app.config.get('ADMISSION_RETRY_AFTER', 2))
+
+    return {
+        'mysql': mysql, 'pagos': pagos, 'subidas': subidas, 'almacen': almacen, 'renditions': renditions,
+        'catalogo_cache': catalogo_cache, 'page_cache': page_cache, 'buscador': buscador,
+        'feed_comentarios': feed_comentarios, 'barrendero': barrendero, 'hasher': hasher,
+        'limite_auth_ip': limite_auth_ip, 'limite_auth_usuario': limite_auth_usuario, 'admision': admision,
+    }
+
+def _metricas(app, s):
+    # /metrics en formato Prometheus: latencia por ruta, consultas por petición,
+    # consultas lentas por forma y las estadísticas del pool, cachés y límites
+    from metrics import Metrics
+    metricas = Metrics(app, s['mysql'])
+    metricas.collector('evalve_db_pool', 'Estado del pool de conexiones MySQL', s['mysql'].pool.snapshot, label='stat')
+    metricas.collector('evalve_catalogo_cache', 'Caché del catálogo', s['catalogo_cache'].stats, label='stat')
+    metricas.collector('evalve_search_index', 'Índice de búsqueda', s['buscador'].stats, label='stat')
+    metricas.collector('evalve_comment_feed', 'Feed en vivo de comentarios', s['feed_comentarios'].stats, label='stat')
+    metricas.collector('evalve_page_cache', 'Caché de páginas renderizadas', s['page_cache'].stats, label='stat')
+    metricas.collector('evalve_auth_limit_ip', 'Límite de intentos de login por IP', s['limite_auth_ip'].stats, label='stat')
+    metricas.collector('evalve_auth_limit_usuario', 'Límite de intentos de login por usuario', s['limite_auth_usuario'].stats, label='stat')
+    metricas.collector('evalve_admission', 'Control de admisión por ruta (concurrencia y tasa)', s['admision'].stats,
+                       label=('route', 'stat'))
+    return metricas
+
+def _comandos(app, s):
+    mysql = s['mysql']
+
+    # Esquema: migrations/NNNN_*.sql (ver migrate.py)
+    @app.cli.command('migrar')
+    @click.option('--solo-marcar', type=int, default=None,
+                  help='Registrar como aplicadas hasta esta versión sin ejecutarlas (base creada a mano)')
+    def migrar_command(solo_marcar):
+        import migrate
+        with mysql.pool.connection() as conn:
+            aplicadas = migrate.migrate(conn, only_mark=solo_marcar)
+        print(f"Migraciones: {len(aplicadas)}" if aplicadas else "El esquema está al día")
+
+    @app.cli.command('barrer-reservas')
+    def barrer_reservas_command():
+        print(f"Reservas liberadas: {s['barrendero'].tarea()}")
+
+    @app.cli.command('generar-versiones')
+    def generar_versiones_command():
+        # Para imágenes (y posters de video) subidos antes de que existiera el pipeline
+        from blueprints.helpers import generar_versiones
+        with mysql.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, ruta FROM multimedia WHERE tipo IN ('imagen', 'video') AND ruta_thumb IS NULL")
+            pendientes = [('multimedia', id, ruta) for id, ruta in cursor.fetchall()]
+            cursor.execute("SELECT id, imagen_url FROM productos WHERE imagen_url IS NOT NULL AND imagen_thumb IS NULL")
+            pendientes += [('productos', id, ruta) for id, ruta in cursor.fetchall()]
+            cursor.close()
+        for tabla, id, ruta in pendientes:
+            generar_versiones(tabla, id, ruta)
+        s['renditions'].shutdown(wait=True)
+        print(f"Imágenes procesadas: {len(pendientes)}")
+
+    @app.cli.command('limpiar-subidas')
+    def limpiar_subidas_command():
+        print(f"Subidas abandonadas borradas: {s['subidas'].cleanup(app.config.get('SUBIDA_MAX_INACTIVA', 24 * 3600))}")
+
+def create_app(config=None):
+    # `config`: clase/objeto o dict de configuración; sin él se usa config.AppConfig o el entorno
+    import assets
+    import sessions
+    from renditions import srcset as build_srcset
+    from blueprints import register_blueprints
+
+    app = Flask(__name__)
+    _configurar(app, config)
+
+    # Sesión en el servidor: la cookie solo lleva un id firmado (SESSION_BACKEND)
+    sessions.init_app(app)
+
+    # Estáticos con huella y precomprimidos (si existe static/build/, ver assets.py)
+    assets.init_app(app)
+
+    servicios = _servicios(app)
+    app.extensions['evalve'] = servicios
+    servicios['metricas'] = _metricas(app, servicios)
+
+    @app.template_global()
+    def srcset(thumb=None, medio=None):
+        return build_srcset(lambda ruta: url_for('static', filename=ruta), thumb, medio)
+
+    register_blueprints(app)
+    _comandos(app, servicios)
+    return app
+
+def __getattr__(nombre):
+    # `server:app` (Gunicorn, benchmarks viejos) crea la app al primer acceso
+    if nombre == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -0,0 +1,192 @@
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, Signer
+
+# ----------------------
+# Sesiones del lado del servidor
+# ----------------------
+# La cookie solo lleva un id firmado. El contenido (carrito, rol, mensajes)
+# vive en un almacén local: cambiar el carrito ya no vuelve a firmar y mandar
+# toda la cookie en cada respuesta. Las sesiones sin actividad en `ttl`
+# segundos expiran.
+REFRESH = 60  # no renovar la expiración en cada petición, solo cada minuto
+
+class ServerSideSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, new=False, expira=0):
+        super().__init__(initial)
+        self.sid = sid
+        self.new = new
+        self.expira = expira
+        self.old_sid = None
+
+    def regenerate(self):
+        # Nuevo id al iniciar sesión (evita fijación de sesión)
+        self.old_sid = self.old_sid or self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.new = True
+        self.modified = True
+
+class MemoryStore:
+    # LRU en memoria del worker. Rápida, pero cada worker tiene la suya:
+    # útil con un solo proceso o detrás de sticky sessions.
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # sid -> (expira, payload)
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._data[sid]
+                return None
+            self._data.move_to_end(sid)
+            return entry
+
+    def set(self, sid, payload, expira):
+        with self._lock:
+            self._data[sid] = (expira, payload)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def touch(self, sid, expira):
+        with self._lock:
+            if sid in self._data:
+                self._data[sid] = (expira, self._data[sid][1])
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def purge(self):
+        now = time.time()
+        with self._lock:
+            for sid in [s for s, (exp, _) in self._data.items() if exp < now]:
+                del self._data[sid]
+
+class SQLiteStore:
+    # Archivo SQLite compartido por todos los workers de la máquina
+    def __init__(self, path, purge_every=500):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS sesiones (sid TEXT PRIMARY KEY, payload TEXT NOT NULL, expira REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sesiones_expira ON sesiones (expira)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, sid):
+        row = self._conn().execute("SELECT expira, payload FROM sesiones WHERE sid = ? AND expira >= ?",
+                                   (sid, time.time())).fetchone()
+        return row
+
+    def set(self, sid, payload, expira):
+        self._conn().execute("INSERT OR REPLACE INTO sesiones (sid, payload, expira) VALUES (?, ?, ?)",
+                             (sid, payload, expira))
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.purge()
+
+    def touch(self, sid, expira):
+        self._conn().execute("UPDATE sesiones SET expira = ? WHERE sid = ?", (expira, sid))
+
+    def delete(self, sid):
+        self._conn().execute("DELETE FROM sesiones WHERE sid = ?", (sid,))
+
+    def purge(self):
+        self._conn().execute("DELETE FROM sesiones WHERE expira < ?", (time.time(),))
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store, ttl=24 * 3600):
+        self.store = store
+        self.ttl = ttl
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="session-id")
+
+    def _new_session(self):
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+        try:
+            sid = self._signer(app).unsign(cookie).decode("ascii")
+        except BadSignature:
+            return self._new_session()
+        entry = self.store.get(sid)
+        if entry is None:
+            return self._new_session()
+        expira, payload = entry
+        return self.session_class(self.serializer.loads(payload), sid=sid, expira=expira)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.old_sid:
+            self.store.delete(session.old_sid)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        expira = now + self.ttl
+        if session.modified or session.new:
+            self.store.set(session.sid, self.serializer.dumps(dict(session)), expira)
+        elif session.expira - now < self.ttl - REFRESH:
+            self.store.touch(session.sid, expira)
+
+        # La cookie solo se manda cuando se crea la sesión: un id no cambia
+        if session.new:
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid).decode("ascii"),
+                domain=domain,
+                path=path,
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                expires=self.get_expiration_time(app, session),
+            )
+
+def init_app(app):
+    backend = app.config.get("SESSION_BACKEND", "sqlite")
+    if backend == "cookie":
+        return
+    if backend == "memory":
+        store = MemoryStore(app.config.get("SESSION_MEMORY_MAX", 10000))
+    else:
+        store = SQLiteStore(app.config.get("SESSION_SQLITE_PATH", os.path.join(app.instance_path, "sesiones.sqlite3")))
+    app.session_interface = ServerSideSessionInterface(store, ttl=app.config.get("SESSION_IDLE_TIMEOUT", 24 * 3600))
@@ -0,0 +1,20 @@
+// Paginación "Cargar más": pide el siguiente bloque al endpoint JSON y lo agrega a la lista
+document.querySelectorAll('.btn-cargar-mas').forEach(function (btn) {
+    btn.addEventListener('click', function () {
+        var url = new URL(btn.dataset.url, window.location.origin);
+        url.searchParams.set('cursor', btn.dataset.cursor);
+        btn.disabled = true;
+        fetch(url, { credentials: 'same-origin' })
+            .then(function (r) { return r.json(); })
+            .then(function (data) {
+                document.querySelector(btn.dataset.target).insertAdjacentHTML('beforeend', data.html);
+                if (data.siguiente) {
+                    btn.dataset.cursor = data.siguiente;
+                    btn.disabled = false;
+                } else {
+                    btn.remove();
+                }
+            })
+            .catch(function () { btn.disabled = false; });
+    });
+});
@@ -0,0 +1,64 @@
+// Comentarios en vivo: los nuevos llegan por Server-Sent Events y se agregan
+// arriba de la lista; publicar no recarga la página.
+(function () {
+    var lista = document.getElementById('lista-comentarios');
+    var form = document.getElementById('form-comentario');
+    if (!lista || !window.EventSource) return;
+
+    var url = new URL(lista.dataset.stream, window.location.origin);
+    url.searchParams.set('desde', lista.dataset.ultimo || '0');
+    var fuente = new EventSource(url);
+
+    fuente.addEventListener('comentarios', function (e) {
+        var vacio = document.getElementById('sin-comentarios');
+        if (vacio) vacio.remove();
+        lista.insertAdjacentHTML('afterbegin', JSON.parse(e.data).html);
+    });
+    fuente.addEventListener('recargar', function () {
+        fuente.close();
+        window.location.reload();
+    });
+    fuente.addEventListener('lleno', function () {
+        fuente.close();
+    });
+
+    if (!form) return;
+
+    function aviso(texto) {
+        var p = document.getElementById('aviso-comentario');
+        if (!p) {
+            p = document.createElement('p');
+            p.id = 'aviso-comentario';
+            p.className = 'error-text';
+            form.appendChild(p);
+        }
+        p.textContent = texto;
+    }
+
+    form.addEventListener('submit', function (e) {
+        e.preventDefault();
+        var boton = form.querySelector('button[type="submit"]');
+        boton.disabled = true;
+        fetch(window.location.pathname, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'X-Requested-With': 'fetch' },
+            body: new FormData(form)
+        }).then(function (r) {
+            if (r.status === 429 || r.status === 503) {
+                // Límite o servidor ocupado: reenviar solo sumaría carga; el texto se conserva
+                var espera = r.headers.get('Retry-After') || '1';
+                aviso('Demasiados comentarios seguidos o servidor ocupado. Intenta en ' + espera + ' s.');
+                return;
+            }
+            if (!r.ok) throw new Error(r.status);
+            aviso('');
+            form.reset();
+        }).catch(function () {
+            // Sin feed o con error: envío normal del formulario
+            form.submit();
+        }).finally(function () {
+            boton.disabled = false;
+        });
+    });
+})();
@@ -0,0 +1,34 @@
+// Galería perezosa: los videos llevan preload="none" y el poster en data-poster;
+// solo cuando entran en pantalla se pone el poster (o, sin poster, se piden los
+// metadatos para mostrar el primer cuadro). Las imágenes usan loading="lazy".
+(function () {
+    var lista = document.getElementById('lista-multimedia');
+    if (!lista) return;
+
+    function mostrar(video) {
+        video.removeAttribute('data-lazy');
+        if (video.dataset.poster) {
+            video.poster = video.dataset.poster;
+        } else {
+            video.preload = 'metadata';
+        }
+    }
+
+    var observador = window.IntersectionObserver && new IntersectionObserver(function (entradas) {
+        entradas.forEach(function (e) {
+            if (!e.isIntersecting) return;
+            observador.unobserve(e.target);
+            mostrar(e.target);
+        });
+    }, { rootMargin: '200px 0px' });
+
+    function observar() {
+        lista.querySelectorAll('video[data-lazy]').forEach(function (video) {
+            if (observador) observador.observe(video); else mostrar(video);
+        });
+    }
+
+    observar();
+    // "Cargar más" agrega elementos a la lista (ver cargar_mas.js)
+    new MutationObserver(observar).observe(lista, { childList: true });
+})();
@@ -0,0 +1,88 @@
+// Subida de videos por partes: crea la subida, manda trozos con PATCH y, si se
+// corta, pregunta con HEAD hasta dónde llegó y continúa desde ahí.
+(function () {
+    var form = document.querySelector('.upload-form');
+    var input = document.getElementById('archivo');
+    var estado = document.getElementById('estado-subida');
+    if (!form || !input) return;
+
+    var TROZO = 8 * 1024 * 1024;
+    var BASE = form.dataset.videoUrl;
+
+    function esVideo(file) {
+        return /\.(mp4|mov)$/i.test(file.name);
+    }
+
+    function clave(file) {
+        return 'subida:' + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    function mostrar(texto) {
+        if (estado) estado.textContent = texto;
+    }
+
+    function crear(file) {
+        return fetch(BASE, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ nombre: file.name, tamano: file.size })
+        }).then(function (r) {
+            return r.json().then(function (data) {
+                if (!r.ok) throw new Error(data.error || 'No se pudo iniciar la subida');
+                localStorage.setItem(clave(file), data.id);
+                return { id: data.id, offset: 0 };
+            });
+        });
+    }
+
+    function reanudar(file) {
+        var id = localStorage.getItem(clave(file));
+        if (!id) return crear(file);
+        return fetch(BASE + '/' + id, { method: 'HEAD', credentials: 'same-origin' }).then(function (r) {
+            if (!r.ok) return crear(file);
+            return { id: id, offset: parseInt(r.headers.get('Upload-Offset'), 10) };
+        });
+    }
+
+    function enviar(file, id, offset, intentos) {
+        if (offset >= file.size) return Promise.resolve();
+        var fin = Math.min(offset + TROZO, file.size);
+        return fetch(BASE + '/' + id, {
+            method: 'PATCH',
+            credentials: 'same-origin',
+            headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/offset+octet-stream' },
+            body: file.slice(offset, fin)
+        }).then(function (r) {
+            if (!r.ok) throw new Error('HTTP ' + r.status);
+            return r.json();
+        }).then(function (data) {
+            mostrar('Subiendo... ' + Math.round(100 * data.offset / file.size) + '%');
+            if (data.completo) return;
+            return enviar(file, id, data.offset, 0);
+        }).catch(function (err) {
+            if (intentos >= 5) throw err;
+            // Espera creciente y vuelve a preguntar el offset real al servidor
+            return new Promise(function (ok) { setTimeout(ok, 1000 * Math.pow(2, intentos)); })
+                .then(function () { return fetch(BASE + '/' + id, { method: 'HEAD', credentials: 'same-origin' }); })
+                .then(function (r) { return enviar(file, id, parseInt(r.headers.get('Upload-Offset'), 10), intentos + 1); });
+        });
+    }
+
+    form.addEventListener('submit', function (ev) {
+        var file = input.files[0];
+        if (!file || !esVideo(file)) return;
+        ev.preventDefault();
+        form.querySelector('button[type=submit]').disabled = true;
+        reanudar(file)
+            .then(function (s) { return enviar(file, s.id, s.offset, 0).then(function () { return s.id; }); })
+            .then(function () {
+                localStorage.removeItem(clave(file));
+                window.location.reload();
+            })
+            .catch(function (err) {
+                mostrar('Error: ' + err.message + '. Vuelve a seleccionar el archivo para continuar.');
+                form.querySelector('button[type=submit]').disabled = false;
+            });
+    });
+})();
@@ -0,0 +1,180 @@
+import glob
+import hashlib
+import os
+import shutil
+import uuid
+
+# ----------------------
+# Almacenamiento direccionado por contenido
+# ----------------------
+# Cada archivo se guarda una sola vez bajo su SHA-256
+# (static/uploads/cas/ab/cd/abcd....png) y la tabla `archivos` lleva cuántas
+# filas lo usan. Subir algo que ya existe solo suma una referencia; el archivo
+# se borra cuando se suelta la última.
+#
+# Las funciones no hacen commit: el que llama guarda su fila (multimedia,
+# productos) en la misma transacción. Nada se borra del disco antes de saber
+# cómo terminó: tras el commit, purge() con lo que regresó release(); antes de
+# un rollback, discard() con lo que acaba de escribir put_stream()/put_file(). El INSERT ... ON DUPLICATE KEY deja la
+# fila de `archivos` bloqueada hasta el commit, así un borrado simultáneo del
+# mismo contenido espera en vez de quitar el archivo que se acaba de reutilizar.
+BUFFER = 1024 * 1024
+
+def _unlink(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class ContentStore:
+    def __init__(self, static_root, subdir="uploads/cas"):
+        self.static_root = static_root
+        self.subdir = subdir
+        os.makedirs(os.path.join(static_root, subdir), exist_ok=True)
+
+    def ruta_para(self, digest, ext):
+        # Dos niveles de carpetas para no juntar miles de archivos en una sola
+        return f"{self.subdir}/{digest[:2]}/{digest[2:4]}/{digest}.{ext.lower()}"
+
+    def _abs(self, ruta):
+        return os.path.join(self.static_root, ruta)
+
+    @staticmethod
+    def _hash(stream):
+        h, tamano = hashlib.sha256(), 0
+        while True:
+            data = stream.read(BUFFER)
+            if not data:
+                return h.hexdigest(), tamano
+            h.update(data)
+            tamano += len(data)
+
+    def _tmp(self):
+        return os.path.join(self.static_root, self.subdir, f".{uuid.uuid4().hex}.tmp")
+
+    def _referenciar(self, conn, digest, ext, tamano):
+        # Suma una referencia y regresa la ruta guardada (la del primero que lo subió)
+        ruta = self.ruta_para(digest, ext)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("INSERT INTO archivos (hash, ruta, tamano, refs) VALUES (%s, %s, %s, 1) "
+                           "ON DUPLICATE KEY UPDATE refs = refs + 1", (digest, ruta, tamano))
+            cursor.execute("SELECT ruta FROM archivos WHERE hash = %s", (digest,))
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+    def _colocar(self, tmp, ruta):
+        destino = self._abs(ruta)
+        if os.path.exists(destino):
+            os.remove(tmp)
+            return False
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(tmp, destino)
+        return True
+
+    def put_stream(self, conn, stream, ext):
+        # Regresa (hash, ruta relativa a static/, escrito). Con un stream que
+        # permite seek (FileStorage de Werkzeug) primero solo se calcula el hash:
+        # si el contenido ya existe no se escribe nada en disco.
+        seekable = getattr(stream, "seekable", None)
+        if seekable() if seekable else hasattr(stream, "seek"):
+            inicio = stream.tell()
+            digest, tamano = self._hash(stream)
+            ruta = self._referenciar(conn, digest, ext, tamano)
+            if os.path.exists(self._abs(ruta)):
+                return digest, ruta, False
+            stream.seek(inicio)
+            tmp = self._tmp()
+            with open(tmp, "wb") as f:
+                shutil.copyfileobj(stream, f, BUFFER)
+            return digest, ruta, self._colocar(tmp, ruta)
+
+        # Sin seek: se escribe a un temporal calculando el hash al vuelo
+        tmp, h, tamano = self._tmp(), hashlib.sha256(), 0
+        with open(tmp, "wb") as f:
+            while True:
+                data = stream.read(BUFFER)
+                if not data:
+                    break
+                h.update(data)
+                f.write(data)
+                tamano += len(data)
+        digest = h.hexdigest()
+        try:
+            ruta = self._referenciar(conn, digest, ext, tamano)
+        except Exception:
+            os.remove(tmp)
+            raise
+        return digest, ruta, self._colocar(tmp, ruta)
+
+    def put_file(self, conn, path, ext):
+        # Adopta un archivo ya escrito (p. ej. una subida por partes terminada):
+        # se mueve con rename si el contenido es nuevo, o se borra si ya existía
+        with open(path, "rb") as f:
+            digest, tamano = self._hash(f)
+        ruta = self._referenciar(conn, digest, ext, tamano)
+        destino = self._abs(ruta)
+        if os.path.exists(destino):
+            os.remove(path)
+            return digest, ruta, False
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        os.replace(path, destino)
+        return digest, ruta, True
+
+    def release(self, conn, digest):
+        # Suelta una referencia. Si era la última quita la fila de `archivos` y
+        # regresa {hash: [archivo y sus versiones reducidas]} para pasarlo a
+        # purge() después del commit: si el que llama hace rollback la fila
+        # vuelve y el disco no se tocó.
+        if not digest:
+            return {}
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT ruta, refs FROM archivos WHERE hash = %s FOR UPDATE", (digest,))
+            fila = cursor.fetchone()
+            if fila is None:
+                return {}
+            ruta, refs = fila
+            if refs > 1:
+                cursor.execute("UPDATE archivos SET refs = refs - 1 WHERE hash = %s", (digest,))
+                return {}
+            cursor.execute("DELETE FROM archivos WHERE hash = %s", (digest,))
+        finally:
+            cursor.close()
+        carpeta = os.path.dirname(self._abs(ruta))
+        return {digest: [self._abs(ruta)] + glob.glob(os.path.join(carpeta, "renditions", f"{digest}.*"))}
+
+    def purge(self, conn, pendientes):
+        # Borra del disco lo que release() dejó sin referencias, ya con el commit
+        # hecho. La fila se vuelve a buscar con bloqueo: si una subida del mismo
+        # contenido la recreó entretanto el archivo se queda, y una que llegue
+        # durante el borrado espera (gap lock) y lo vuelve a escribir.
+        for digest, paths in pendientes.items():
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1 FROM archivos WHERE hash = %s FOR UPDATE", (digest,))
+                if cursor.fetchone() is None:
+                    _unlink(paths)
+                conn.commit()
+            finally:
+                cursor.close()
+
+    def discard(self, ruta, escrito):
+        # Antes del rollback de quien llamó put_stream()/put_file(): quita el
+        # archivo recién escrito, que sin la fila de `archivos` quedaría huérfano.
+        # La fila sigue bloqueada: una subida simultánea del mismo contenido
+        # espera y, al no encontrarlo, lo escribe de nuevo.
+        if escrito:
+            _unlink([self._abs(ruta)])
+
+    def stats(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0), COALESCE(SUM(refs), 0), "
+                           "COALESCE(SUM(tamano * (refs - 1)), 0) FROM archivos")
+            archivos, bytes_, refs, ahorrados = cursor.fetchone()
+        finally:
+            cursor.close()
+        return {"archivos": archivos, "bytes": int(bytes_), "referencias": int(refs), "bytes_ahorrados": int(ahorrados)}
@@ -0,0 +1,40 @@
+import os
+import sys
+
+from flask import Flask, url_for
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assets
+
+# ----------------------
+# Estáticos con manifiesto de build/
+# ----------------------
+def app_con_build(tmp_path):
+    static = tmp_path / "static"
+    (static / "css").mkdir(parents=True)
+    (static / "css" / "style.css").write_text("body { color: red; }")
+    (static / "uploads").mkdir()
+    (static / "uploads" / "foto.png").write_bytes(b"\x89PNG imagen")
+    assets.build(str(static))
+    app = Flask(__name__, static_folder=str(static))
+    assets.init_app(app)
+    return app
+
+def test_archivo_con_huella(tmp_path):
+    app = app_con_build(tmp_path)
+    with app.test_request_context():
+        url = url_for("static", filename="css/style.css")
+    assert "/static/build/css/style." in url
+    respuesta = app.test_client().get(url)
+    assert respuesta.status_code == 200
+    assert "immutable" in respuesta.headers["Cache-Control"]
+
+def test_archivo_sin_huella_con_manifiesto(tmp_path):
+    # uploads/ no pasa por el build: se sirve con la vista estática de Flask
+    app = app_con_build(tmp_path)
+    respuesta = app.test_client().get("/static/uploads/foto.png")
+    assert respuesta.status_code == 200
+    assert respuesta.data == b"\x89PNG imagen"
+    assert "immutable" not in respuesta.headers.get("Cache-Control", "")
+    respuesta.close()
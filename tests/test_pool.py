@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool, PoolTimeout
+
+# ----------------------
+# Pool de conexiones contra sqlite3
+# ----------------------
+# sqlite3 no tiene ping(): se verifica la conexión con un SELECT 1, que falla
+# si la conexión está cerrada.
+def ping(conn):
+    conn.execute("SELECT 1")
+
+@pytest.fixture
+def archivo(tmp_path):
+    ruta = str(tmp_path / "pool.db")
+    conn = sqlite3.connect(ruta)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, valor TEXT)")
+    conn.commit()
+    conn.close()
+    return ruta
+
+def nuevo_pool(archivo, **kwargs):
+    kwargs.setdefault("ping", ping)
+    return ConnectionPool(lambda: sqlite3.connect(archivo, check_same_thread=False), **kwargs)
+
+def test_reutiliza_conexiones(archivo):
+    pool = nuevo_pool(archivo, size=2)
+    with pool.connection() as primera:
+        pass
+    with pool.connection() as segunda:
+        assert segunda is primera
+    stats = pool.snapshot()
+    assert stats["created"] == 1
+    assert stats["borrowed"] == 2
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+
+def test_recicla_por_tiempo_de_vida(archivo):
+    pool = nuevo_pool(archivo, max_lifetime=0.05)
+    with pool.connection() as vieja:
+        pass
+    time.sleep(0.1)
+    with pool.connection() as nueva:
+        assert nueva is not vieja
+    assert pool.snapshot()["recycled"] == 1
+    assert pool.snapshot()["created"] == 2
+    with pytest.raises(sqlite3.ProgrammingError):
+        vieja.execute("SELECT 1")
+
+def test_timeout_registra_espera(archivo):
+    pool = nuevo_pool(archivo, size=1, wait_timeout=0.1)
+    conn = pool.acquire()
+    inicio = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert time.monotonic() - inicio >= 0.1
+    stats = pool.snapshot()
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.1
+    assert stats["wait_seconds_total"] >= stats["wait_seconds_max"]
+    pool.release(conn)
+
+def test_espera_hasta_que_se_devuelve(archivo):
+    pool = nuevo_pool(archivo, size=1, wait_timeout=2)
+    conn = pool.acquire()
+    threading.Timer(0.05, pool.release, (conn,)).start()
+    assert pool.acquire() is conn
+    stats = pool.snapshot()
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 0
+    assert stats["wait_seconds_max"] > 0
+
+def test_rollback_al_devolver(archivo):
+    pool = nuevo_pool(archivo, size=1)
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO t (valor) VALUES ('sin commit')")
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+def test_descarta_conexion_rota(archivo):
+    pool = nuevo_pool(archivo, size=1)
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection() as rota:
+            rota.close()
+            rota.execute("SELECT 1")
+    with pool.connection() as conn:
+        assert conn is not rota
+        conn.execute("SELECT 1")
+    stats = pool.snapshot()
+    assert stats["created"] == 2
+    assert stats["in_use"] == 0
+
+def test_verifica_al_prestar_tras_inactividad(archivo):
+    pool = nuevo_pool(archivo, ping_after=0)
+    with pool.connection() as conn:
+        pass
+    # Cerrada mientras esperaba en el pool (p. ej. wait_timeout del servidor)
+    conn.close()
+    with pool.connection() as nueva:
+        assert nueva is not conn
+    assert pool.snapshot()["health_failures"] == 1
@@ -0,0 +1,175 @@
+import os
+import re
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reservas
+
+# ----------------------
+# Reservas contra sqlite3
+# ----------------------
+# reservas.py escribe SQL de MySQL: el adaptador traduce lo poco que sqlite3
+# no entiende (%s, NOW(), INTERVAL, FOR UPDATE) y expone IntegrityError
+# como atributo de la conexión, igual que MySQLdb.
+def traducir(sql):
+    sql = sql.replace("NOW() + INTERVAL %s SECOND", "datetime('now', '+' || %s || ' seconds')")
+    sql = sql.replace("NOW()", "datetime('now')")
+    sql = re.sub(r"\s+FOR UPDATE$", "", sql)
+    return sql.replace("%s", "?")
+
+class Cursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(traducir(sql), tuple(params))
+
+    def executemany(self, sql, filas):
+        self._cursor.executemany(traducir(sql), filas)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+class Conexion:
+    IntegrityError = sqlite3.IntegrityError
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return Cursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+@pytest.fixture
+def conn():
+    raw = sqlite3.connect(":memory:")
+    raw.executescript("""
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, stock INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE reservas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token TEXT NOT NULL,
+            producto_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'activa',
+            usuario TEXT,
+            creada TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            expira TEXT NOT NULL,
+            UNIQUE (token, producto_id)
+        );
+        INSERT INTO productos (id, stock) VALUES (1, 5), (2, 3);
+    """)
+    yield Conexion(raw)
+    raw.close()
+
+def stock(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, stock FROM productos ORDER BY id")
+    return dict(cursor.fetchall())
+
+def estados(conn, token):
+    cursor = conn.cursor()
+    cursor.execute("SELECT producto_id, estado FROM reservas WHERE token = %s ORDER BY producto_id", (token,))
+    return dict(cursor.fetchall())
+
+def vencer(conn, token):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE reservas SET expira = datetime('now', '-1 seconds') WHERE token = %s", (token,))
+    conn.commit()
+
+CARRITO = {"1": 2, "2": 1}
+
+def test_reservar_aparta_stock(conn):
+    token = reservas.token_para("ana", CARRITO)
+    assert reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    assert stock(conn) == {1: 3, 2: 2}
+    assert estados(conn, token) == {1: "activa", 2: "activa"}
+
+def test_doble_clic_no_aparta_dos_veces(conn):
+    token = reservas.token_para("ana", CARRITO)
+    assert reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    assert reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    assert stock(conn) == {1: 3, 2: 2}
+
+def test_stock_insuficiente_no_aparta_nada(conn):
+    # La línea 1 alcanza y la 2 no: el UPDATE toca una sola fila y se revierte
+    carrito = {"1": 2, "2": 4}
+    token = reservas.token_para("ana", carrito)
+    assert not reservas.reservar(conn, token, "ana", carrito, 1800)
+    assert stock(conn) == {1: 5, 2: 3}
+    assert estados(conn, token) == {}
+
+def test_confirmar_reserva_activa(conn):
+    token = reservas.token_para("ana", CARRITO)
+    reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    assert reservas.confirmar(conn, token, CARRITO)
+    assert estados(conn, token) == {1: "confirmada", 2: "confirmada"}
+    assert stock(conn) == {1: 3, 2: 2}
+
+def test_confirmar_tras_vencer_descuenta_de_nuevo(conn):
+    token = reservas.token_para("ana", CARRITO)
+    reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    vencer(conn, token)
+    assert reservas.liberar_vencidas(conn) == 2
+    assert stock(conn) == {1: 5, 2: 3}
+    assert reservas.confirmar(conn, token, CARRITO)
+    assert stock(conn) == {1: 3, 2: 2}
+
+def test_confirmar_tras_vencer_sin_stock(conn):
+    token = reservas.token_para("ana", CARRITO)
+    reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    vencer(conn, token)
+    reservas.liberar_vencidas(conn)
+    # Otro cliente se llevó el stock mientras tanto
+    otro = {"2": 3}
+    assert reservas.reservar(conn, reservas.token_para("beto", otro), "beto", otro, 1800)
+    assert not reservas.confirmar(conn, token, CARRITO)
+    assert stock(conn) == {1: 5, 2: 0}
+
+def test_liberar_devuelve_stock(conn):
+    token = reservas.token_para("ana", CARRITO)
+    reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    assert reservas.liberar(conn, token) == 2
+    assert stock(conn) == {1: 5, 2: 3}
+    assert estados(conn, token) == {1: "liberada", 2: "liberada"}
+    # Liberar dos veces no devuelve el stock dos veces
+    assert reservas.liberar(conn, token) == 0
+    assert stock(conn) == {1: 5, 2: 3}
+
+def test_liberar_vencidas_respeta_las_vigentes(conn):
+    vieja = reservas.token_para("ana", {"1": 1})
+    nueva = reservas.token_para("beto", {"2": 1})
+    reservas.reservar(conn, vieja, "ana", {"1": 1}, 1800)
+    reservas.reservar(conn, nueva, "beto", {"2": 1}, 1800)
+    vencer(conn, vieja)
+    assert reservas.liberar_vencidas(conn) == 1
+    assert estados(conn, vieja) == {1: "liberada"}
+    assert estados(conn, nueva) == {2: "activa"}
+    assert stock(conn) == {1: 5, 2: 2}
+
+def test_token_liberado_no_cuenta_como_reserva(conn):
+    # El carrito vuelve a un estado anterior con el mismo nonce: el token se
+    # repite, pero sus filas están liberadas y no apartan nada
+    token = reservas.token_para("ana", CARRITO)
+    reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    reservas.liberar(conn, token)
+    assert not reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    assert stock(conn) == {1: 5, 2: 3}
+
+def test_nonce_nuevo_tras_liberar_vuelve_a_apartar(conn):
+    token = reservas.token_para("ana", CARRITO, "uno")
+    reservas.reservar(conn, token, "ana", CARRITO, 1800)
+    reservas.liberar(conn, token)
+    nuevo = reservas.token_para("ana", CARRITO, "dos")
+    assert nuevo != token
+    assert reservas.reservar(conn, nuevo, "ana", CARRITO, 1800)
+    assert stock(conn) == {1: 3, 2: 2}
+    assert estados(conn, nuevo) == {1: "activa", 2: "activa"}